@@ -9,48 +9,153 @@ import os
 import re
 import math
 import argparse
-import shutil
 import sys
-import subprocess
-from typing import List, Tuple, Dict, Optional
+from functools import lru_cache
+from typing import List, Tuple, Dict, Optional, Iterator
 from datetime import datetime
 
-# Image compression imports
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-    print("WARNING: PIL/Pillow not available - image compression disabled")
+# Heavy or rarely needed modules (PIL, subprocess, shutil, socket) are imported
+# inside the functions that use them, so that listing images or talking to the
+# daemon does not pay for them at startup.
+
+# Image library state, resolved on first use by get_pil_image()
+PIL_AVAILABLE = None
+_PIL_IMAGE = None
 
 # Constants for filename parsing
 TIMESTAMP_PATTERN = r'(\d{4})(\d{2})(\d{2})(\d{2})(\d{2})'  # YYYYMMDDHHMM format
 
-def load_template(template_path: str = None) -> str:
-    """Load template from path or use default"""
+# Recognized image file extensions (lower case)
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
+
+# Report language used when none is given (catalogs live in locales/<lang>.json)
+DEFAULT_LANG = 'de'
+
+# Walk sections: a new section starts after a time gap or spatial jump larger than these
+DEFAULT_SECTION_GAP_MINUTES = 120
+DEFAULT_SECTION_JUMP_KM = 2.0
+
+# Per-user photo index (SQLite), location overridable via environment
+PHOTO_INDEX_ENV = 'WIP_INDEX'
+
+# Daemon settings (UNIX socket, one request per connection)
+DAEMON_SOCKET_ENV = 'WIP_SOCKET'
+
+# Caches kept warm for the lifetime of the process (and thus of the daemon)
+_TEMPLATE_CACHE: Dict[str, Tuple[float, str]] = {}
+_IMAGE_SIZE_CACHE: Dict[Tuple[str, int, int], Tuple[int, int]] = {}
+_CATALOG_MTIMES: Dict[str, int] = {}
+
+def get_pil_image():
+    """Import PIL.Image on first use. Returns the module or None if Pillow is missing"""
+    global PIL_AVAILABLE, _PIL_IMAGE
+    if PIL_AVAILABLE is None:
+        try:
+            from PIL import Image
+            _PIL_IMAGE = Image
+            PIL_AVAILABLE = True
+        except ImportError:
+            PIL_AVAILABLE = False
+            print("WARNING: PIL/Pillow not available - image compression disabled")
+    return _PIL_IMAGE
+
+def read_text_cached(path: str) -> str:
+    """Read a UTF-8 text file, reusing the cached content while its mtime is unchanged"""
+    mtime = os.path.getmtime(path)
+    cached = _TEMPLATE_CACHE.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    _TEMPLATE_CACHE[path] = (mtime, content)
+    return content
+
+def get_image_size(img_path: str) -> Tuple[int, int]:
+    """Return (width, height) of an image, cached by path, mtime and file size"""
+    stat = os.stat(img_path)
+    key = (os.path.abspath(img_path), stat.st_mtime_ns, stat.st_size)
+    size = _IMAGE_SIZE_CACHE.get(key)
+    if size is None:
+        Image = get_pil_image()
+        if Image is None:
+            raise RuntimeError("PIL/Pillow not available")
+        with Image.open(img_path) as img:
+            size = img.size
+        _IMAGE_SIZE_CACHE[key] = size
+    return size
+
+def get_locales_dir() -> str:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(script_dir), "locales")
+
+def available_languages() -> List[str]:
+    """Languages with a message catalog in locales/"""
+    try:
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(get_locales_dir()) if name.endswith('.json'))
+    except OSError:
+        return [DEFAULT_LANG]
+
+@lru_cache(maxsize=None)
+def load_catalog(lang: str = DEFAULT_LANG) -> Dict[str, str]:
+    """Message catalog for a language, parsed once (see refresh_catalogs). Missing keys fall back to German"""
+    import json
+    catalog: Dict[str, str] = {}
+    for code in dict.fromkeys((DEFAULT_LANG, lang)):
+        path = os.path.join(get_locales_dir(), f"{code}.json")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                catalog.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"ERROR loading message catalog {path}: {e}")
+    return catalog
+
+def refresh_catalogs():
+    """Drop cached catalogs, and strings translated from them, when a locales/*.json file changed.
+    Called per daemon request, so edited catalogs are picked up like edited templates."""
+    mtimes = {}
+    try:
+        with os.scandir(get_locales_dir()) as it:
+            for entry in it:
+                if entry.name.endswith('.json'):
+                    mtimes[entry.name] = entry.stat().st_mtime_ns
+    except OSError:
+        pass
+    if mtimes != _CATALOG_MTIMES:
+        load_catalog.cache_clear()
+        extract_timestamp_info.cache_clear()
+        _CATALOG_MTIMES.clear()
+        _CATALOG_MTIMES.update(mtimes)
+
+def msg(key: str, lang: str = DEFAULT_LANG, **values) -> str:
+    """Look up (and format) a message from the catalog"""
+    text = load_catalog(lang).get(key, key)
+    return text.format(**values) if values else text
+
+def load_template(template_path: str = None, lang: str = DEFAULT_LANG) -> str:
+    """Load template from path or use default (templates/default.<lang>.md, then templates/default.md)"""
     script_dir = os.path.dirname(os.path.abspath(__file__))
     system_dir = os.path.dirname(script_dir)
     
     # If custom template path provided
     if template_path and os.path.isfile(template_path):
         try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return read_text_cached(template_path)
         except Exception as e:
             print(f"ERROR loading custom template: {e}")
             print("Using default template instead.")
     
     # Use default template
-    default_path = os.path.join(system_dir, "templates", "default.md")
+    default_path = os.path.join(system_dir, "templates", f"default.{lang}.md")
+    if lang == DEFAULT_LANG or not os.path.exists(default_path):
+        default_path = os.path.join(system_dir, "templates", "default.md")
     if os.path.exists(default_path):
         try:
-            with open(default_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return read_text_cached(default_path)
         except Exception as e:
             print(f"ERROR loading default template: {e}")
     
     # Fallback to built-in template
-    return get_builtin_template()
+    return get_builtin_template(lang)
 
 def load_top_sheet(top_sheet_path: str = None) -> str:
     """Load top sheet HTML from path or use default"""
@@ -60,8 +165,7 @@ def load_top_sheet(top_sheet_path: str = None) -> str:
     # If custom top sheet path provided
     if top_sheet_path and os.path.isfile(top_sheet_path):
         try:
-            with open(top_sheet_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return read_text_cached(top_sheet_path)
         except Exception as e:
             print(f"ERROR loading custom top sheet: {e}")
             print("Using default top sheet instead.")
@@ -70,30 +174,32 @@ def load_top_sheet(top_sheet_path: str = None) -> str:
     default_path = os.path.join(system_dir, "htmlsheets", "top_sheet.html")
     if os.path.exists(default_path):
         try:
-            with open(default_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return read_text_cached(default_path)
         except Exception as e:
             print(f"ERROR loading default top sheet: {e}")
             return ""
     
     return ""
 
-def get_builtin_template() -> str:
+def get_builtin_template(lang: str = DEFAULT_LANG) -> str:
     """Fallback built-in template"""
-    return """# {title}
+    date_label, location_label, images_label = (msg(key, lang) for key in ('date_label', 'location_label', 'images_label'))
+    return f"""# {{title}}
 
-**Datum:** {date} | **Ort:** {location}
+**{date_label}:** {{date}} | **{location_label}:** {{location}}
 
 ---
 
-{content}
+{{content}}
 
 ---
 
-*{total_images} Bilder • {total_distance} km*"""
+*{{total_images}} {images_label} • {{total_distance}} km*"""
 
+@lru_cache(maxsize=1)
 def check_wkhtmltopdf_installation() -> bool:
-    """Check if wkhtmltopdf is available"""
+    """Check if wkhtmltopdf is available (spawned once per process)"""
+    import subprocess
     try:
         result = subprocess.run(['wkhtmltopdf', '--version'], 
                               capture_output=True, text=True, timeout=10)
@@ -101,10 +207,11 @@ def check_wkhtmltopdf_installation() -> bool:
     except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
         return False
 
-def extract_timestamp_info(filename: str) -> Tuple[Optional[datetime], Optional[str], Optional[str]]:
+@lru_cache(maxsize=8192)
+def extract_timestamp_info(filename: str, lang: str = DEFAULT_LANG) -> Tuple[Optional[datetime], Optional[str], Optional[str]]:
     """
     Extract timestamp, time string, and elevation from filename.
-    Returns (datetime_obj, time_string, elevation_string)
+    Returns (datetime_obj, time_string, elevation_string), strings in the given language
     """
     # Remove file extension
     name_without_ext = os.path.splitext(filename)[0]
@@ -115,7 +222,7 @@ def extract_timestamp_info(filename: str) -> Tuple[Optional[datetime], Optional[
     elevation_match = re.search(elevation_pattern, name_without_ext)
     if elevation_match:
         elevation_value = elevation_match.group(1)
-        elevation_string = f"Seehöhe: {elevation_value} m"
+        elevation_string = msg('elevation', lang, elevation=elevation_value)
     
     # Remove coordinates part (everything after last ___)
     if '___' in name_without_ext:
@@ -133,7 +240,7 @@ def extract_timestamp_info(filename: str) -> Tuple[Optional[datetime], Optional[
             datetime_obj = datetime(year, month, day, hour, minute)
             
             # Extract time string for captions
-            time_string = f"Aufnahmezeitpunkt: {hour:02d}:{minute:02d}"
+            time_string = msg('time_taken', lang, time=f"{hour:02d}:{minute:02d}")
             
             return datetime_obj, time_string, elevation_string
             
@@ -206,18 +313,30 @@ class WalkImage:
     """Represents a single image from a walk with date-time and metadata"""
     
     def __init__(self, filename: str, datetime_obj: datetime = None, coordinates: Tuple[float, float] = None):
-        self.filename = filename
+        self.filename = filename  # path relative to the working directory, '/' separated
+        self.basename = os.path.basename(filename)
         self.datetime = datetime_obj
         self.coordinates = coordinates
-        self.caption = self._generate_caption()
-    
-    def _generate_caption(self) -> str:
-        """Generate enhanced caption from filename with time and elevation info"""
-        # Use consolidated timestamp extraction function
-        datetime_obj, time_string, elevation_string = extract_timestamp_info(self.filename)
-        
+        self.elevation = extract_elevation_from_filename(self.basename)
+        self.content_hash: Optional[str] = None  # set when the photo index knows (or needs) it
+        self.index_key: Optional[str] = None  # photo key in the index: content hash or path key
+        self.main_caption = self._extract_main_caption()
+        self._captions: Dict[str, str] = {}
+    
+    @property
+    def caption(self) -> str:
+        return self.get_caption(DEFAULT_LANG)
+    
+    def get_caption(self, lang: str = DEFAULT_LANG) -> str:
+        """Caption in the given language (computed once per language)"""
+        if lang not in self._captions:
+            self._captions[lang] = self._generate_caption(lang)
+        return self._captions[lang]
+    
+    def _extract_main_caption(self) -> str:
+        """Language independent caption text before the timestamp ('' if there is none)"""
         # Extract text before timestamp (main caption)
-        name_without_ext = os.path.splitext(self.filename)[0]
+        name_without_ext = os.path.splitext(self.basename)[0]
         if '___' in name_without_ext:
             parts = name_without_ext.split('___')
             caption_part = parts[0]
@@ -241,8 +360,13 @@ class WalkImage:
         # Capitalize first letter
         if main_caption:
             main_caption = main_caption[0].upper() + main_caption[1:]
-        else:
-            main_caption = "Untitled"
+        return main_caption
+    
+    def _generate_caption(self, lang: str) -> str:
+        """Generate enhanced caption from filename with time and elevation info"""
+        # Use consolidated timestamp extraction function
+        datetime_obj, time_string, elevation_string = extract_timestamp_info(self.basename, lang)
+        main_caption = self.main_caption or msg('untitled', lang)
         
         # Combine all parts
         caption_parts = [main_caption]
@@ -257,6 +381,7 @@ class WalkImage:
         
         return " ".join(caption_parts)
 
+@lru_cache(maxsize=8192)
 def extract_coordinates_from_filename(filename: str) -> Optional[Tuple[float, float]]:
     """Extract GPS coordinates from filename"""
     # Pattern: filename___longitude_latitude___.extension
@@ -273,6 +398,12 @@ def extract_coordinates_from_filename(filename: str) -> Optional[Tuple[float, fl
     
     return None
 
+@lru_cache(maxsize=8192)
+def extract_elevation_from_filename(filename: str) -> Optional[int]:
+    """Extract elevation in meters from filename (pattern: _elev__930__)"""
+    match = re.search(r'_elev__(\d{1,4})__', filename)
+    return int(match.group(1)) if match else None
+
 def haversine_distance(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
     """Calculate distance between two GPS coordinates using Haversine formula"""
     lon1, lat1 = coord1
@@ -292,93 +423,918 @@ def haversine_distance(coord1: Tuple[float, float], coord2: Tuple[float, float])
     
     return c * r
 
-def compress_image(input_path: str, max_size_mb: float = 2.0, quality: int = None) -> bool:
-    """Compress an image if it's larger than max_size_mb with automatic quality optimization"""
-    if not PIL_AVAILABLE:
-        print("WARNING: Compression requested but PIL/Pillow not available. Install with: pip install Pillow")
-        return False
+class PhotoIndex:
+    """
+    Per-user SQLite index of photos by content hash: parsed metadata, compressed
+    derivatives and the reports that used each photo. Shared across all projects.
+    The metadata of a report's figures is stored per report (report_figures): it comes
+    from the filename, so the same photo content can carry different dates or positions.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY, hash TEXT NOT NULL, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS photos (
+            hash TEXT PRIMARY KEY, filename TEXT, taken TEXT,
+            longitude REAL, latitude REAL, elevation INTEGER);
+        CREATE TABLE IF NOT EXISTS derivatives (
+            source_hash TEXT NOT NULL, max_size_mb REAL NOT NULL, quality INTEGER NOT NULL,
+            path TEXT NOT NULL, hash TEXT NOT NULL, settings TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (source_hash, max_size_mb, quality, path));
+        CREATE TABLE IF NOT EXISTS report_figures (
+            report TEXT NOT NULL, figure INTEGER NOT NULL, hash TEXT, filename TEXT, taken TEXT,
+            longitude REAL, latitude REAL, elevation INTEGER, created TEXT,
+            PRIMARY KEY (report, figure));
+        CREATE INDEX IF NOT EXISTS photos_taken ON photos (taken);
+        CREATE INDEX IF NOT EXISTS photos_position ON photos (longitude, latitude);
+        CREATE INDEX IF NOT EXISTS report_figures_taken ON report_figures (taken);
+        CREATE INDEX IF NOT EXISTS report_figures_position ON report_figures (longitude, latitude);
+        CREATE INDEX IF NOT EXISTS derivatives_hash ON derivatives (hash);
+    """
+    
+    def __init__(self, db_path: str = None):
+        import sqlite3
+        self.db_path = db_path or get_photo_index_path()
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(self.SCHEMA)
+        # Indexes created before enhancement settings existed lack this column
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(derivatives)")]
+        if 'settings' not in columns:
+            self.conn.execute("ALTER TABLE derivatives ADD COLUMN settings TEXT NOT NULL DEFAULT ''")
+        # Older indexes linked reports to photos by hash only (one row per content, metadata
+        # shared across reports): move them to report_figures
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reports'").fetchone():
+            self.conn.execute(
+                "INSERT OR IGNORE INTO report_figures (report, figure, hash, filename, taken, longitude, latitude, elevation, created) "
+                "SELECT r.report, COALESCE(r.figure, r.rowid), r.hash, p.filename, p.taken, p.longitude, p.latitude, p.elevation, r.created "
+                "FROM reports r LEFT JOIN photos p ON p.hash = r.hash")
+            self.conn.execute("DROP TABLE reports")
+            self.conn.commit()
+    
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+    
+    def file_hash(self, path: str) -> str:
+        """SHA-256 of the file content; unchanged files (same mtime and size) are not re-read"""
+        path = os.path.abspath(path)
+        known = self.known_hash(path)
+        if known:
+            return known
+        
+        stat = os.stat(path)
+        import hashlib
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+        self.conn.execute("INSERT OR REPLACE INTO files (path, hash, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                          (path, content_hash, stat.st_mtime_ns, stat.st_size))
+        return content_hash
+    
+    def known_hash(self, path: str) -> Optional[str]:
+        """Hash recorded for an unchanged file, without reading its content"""
+        stat = os.stat(path)
+        row = self.conn.execute("SELECT hash FROM files WHERE path = ? AND mtime_ns = ? AND size = ?",
+                                (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)).fetchone()
+        return row[0] if row else None
+    
+    @staticmethod
+    def path_key(path: str) -> str:
+        """Photo key for files that were never hashed (report membership without reading the file)"""
+        return 'path:' + os.path.abspath(path)
+    
+    def record_photo(self, content_hash: str, image: 'WalkImage'):
+        """Store the metadata parsed from the filename"""
+        longitude, latitude = image.coordinates if image.coordinates else (None, None)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO photos (hash, filename, taken, longitude, latitude, elevation) VALUES (?, ?, ?, ?, ?, ?)",
+            (content_hash, image.filename, image.datetime.isoformat() if image.datetime else None,
+             longitude, latitude, image.elevation))
+    
+    def find_derivative(self, source_hash: str, max_size_mb: float, quality: Optional[int], exclude_path: str,
+                        settings: str = '') -> Optional[str]:
+        """Path of an existing, unmodified derivative of source_hash made with the same settings"""
+        rows = self.conn.execute(
+            "SELECT path, hash FROM derivatives WHERE source_hash = ? AND max_size_mb = ? AND quality = ? AND settings = ?",
+            (source_hash, max_size_mb, -1 if quality is None else quality, settings)).fetchall()
+        for path, derivative_hash in rows:
+            if path == os.path.abspath(exclude_path) or not os.path.isfile(path):
+                continue
+            if self.file_hash(path) == derivative_hash:
+                return path
+        return None
+    
+    def is_derivative(self, path: str, source_hash: str, max_size_mb: float, quality: Optional[int],
+                      settings: str = '') -> bool:
+        """True if path still holds the derivative of source_hash recorded for these settings"""
+        row = self.conn.execute(
+            "SELECT hash FROM derivatives WHERE source_hash = ? AND max_size_mb = ? AND quality = ? AND settings = ? AND path = ?",
+            (source_hash, max_size_mb, -1 if quality is None else quality, settings, os.path.abspath(path))).fetchone()
+        return row is not None and row[0] == self.file_hash(path)
+    
+    def original_hash(self, content_hash: str) -> str:
+        """Map the hash of a compressed derivative back to its original photo"""
+        row = self.conn.execute("SELECT source_hash FROM derivatives WHERE hash = ? LIMIT 1",
+                                (content_hash,)).fetchone()
+        return row[0] if row else content_hash
+    
+    def add_derivative(self, source_hash: str, max_size_mb: float, quality: Optional[int], path: str,
+                       settings: str = ''):
+        """Remember that path holds source_hash processed with the given settings"""
+        path = os.path.abspath(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO derivatives (source_hash, max_size_mb, quality, path, hash, settings) VALUES (?, ?, ?, ?, ?, ?)",
+            (source_hash, max_size_mb, -1 if quality is None else quality, path, self.file_hash(path), settings))
+    
+    def record_report(self, report_path: str, figures: List[Tuple[int, 'WalkImage']]):
+        """Link the photos of a report as (figure number, image) pairs, replacing a previous version"""
+        report_path = os.path.abspath(report_path)
+        created = datetime.now().isoformat(timespec='seconds')
+        self.conn.execute("DELETE FROM report_figures WHERE report = ?", (report_path,))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO report_figures (report, figure, hash, filename, taken, longitude, latitude, elevation, created) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(report_path, figure, image.index_key, image.filename,
+              image.datetime.isoformat() if image.datetime else None,
+              image.coordinates[0] if image.coordinates else None,
+              image.coordinates[1] if image.coordinates else None,
+              image.elevation, created)
+             for figure, image in figures])
+        self.conn.commit()
+    
+    def query_reports(self, bbox: Tuple[float, float, float, float] = None,
+                      date_from: datetime = None, date_to: datetime = None) -> List[Tuple[str, int, str, str]]:
+        """Reports containing photos inside bbox (min_lon, min_lat, max_lon, max_lat) and date range.
+        Returns (report, matching photos, first taken, last taken) rows"""
+        conditions, params = [], []
+        if bbox:
+            conditions.append("longitude BETWEEN ? AND ? AND latitude BETWEEN ? AND ?")
+            params += [bbox[0], bbox[2], bbox[1], bbox[3]]
+        if date_from:
+            conditions.append("taken >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            conditions.append("taken < ?")
+            params.append(date_to.isoformat())
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return self.conn.execute(
+            f"SELECT report, COUNT(*), MIN(taken), MAX(taken) FROM report_figures "
+            f"{where} GROUP BY report ORDER BY MIN(taken)",
+            params).fetchall()
+
+def get_photo_index_path() -> str:
+    """Location of the per-user photo index (override with the WIP_INDEX environment variable)"""
+    if os.environ.get(PHOTO_INDEX_ENV):
+        return os.environ[PHOTO_INDEX_ENV]
+    return os.path.join(os.path.expanduser('~'), '.walk_image_processor', 'photo_index.sqlite')
+
+def reuse_derivative(input_path: str, derivative_path: str):
+    """Replace input_path by a known derivative: hardlink if possible, copy otherwise"""
+    import shutil
+    tmp_path = input_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(derivative_path, tmp_path)
+    except OSError:
+        shutil.copy2(derivative_path, tmp_path)
+    os.replace(tmp_path, input_path)
+
+class ProgressReporter:
+    """
+    Progress for long runs: a terminal progress bar (images/s, MB/s saved, ETA) and an
+    optional machine-readable JSONL event stream (stage start/finish, per-image results,
+    errors, heartbeats). All calls happen in the main process, for serial and pool runs alike.
+    """
+    
+    def __init__(self, events_stream=None, show_bar: bool = False, bar_stream=None):
+        import time
+        self._clock = time.monotonic
+        self.events_stream = events_stream
+        self.show_bar = show_bar
+        self.bar_stream = bar_stream or sys.stderr
+        self.started = self._clock()
+        self.stage = None
+        self.stage_started = self.started
+        self.total: Optional[int] = None
+        self.done = 0
+        self.errors = 0
+        self.saved_mb = 0.0
+        self._bar_visible = False
+        self._last_draw = 0.0
+    
+    def event(self, name: str, **data):
+        """Write one JSON line to the event stream"""
+        if self.events_stream is None:
+            return
+        import json
+        record = {'event': name, 'time': round(datetime.now().timestamp(), 3)}
+        record.update(data)
+        self.events_stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.events_stream.flush()
+    
+    def stage_start(self, stage: str, total: int = None):
+        self.stage = stage
+        self.stage_started = self._clock()
+        self.total = total
+        self.done = 0
+        self.saved_mb = 0.0
+        self.event('stage_start', stage=stage, total=total)
+    
+    def set_total(self, total: int):
+        """Total becomes known (e.g. once the streaming scan has finished)"""
+        self.total = total
+        self.event('stage_total', stage=self.stage, total=total)
+        self._draw(force=True)
+    
+    def stage_finish(self, stage: str, **data):
+        self.clear_bar()
+        self.event('stage_finish', stage=stage, elapsed=round(self._clock() - self.stage_started, 3),
+                   count=self.done, **data)
+        self.stage = None
+    
+    def image_done(self, path: str, status: str, old_mb: float = None, new_mb: float = None,
+                   timings: Dict[str, float] = None, message: str = None):
+        """One image finished; status is ok, compressed, enhanced, reused, skipped or error"""
+        self.done += 1
+        if old_mb is not None and new_mb is not None and new_mb < old_mb:
+            self.saved_mb += old_mb - new_mb
+        if status == 'error':
+            self.errors += 1
+        data = {'stage': self.stage, 'path': path, 'status': status, 'done': self.done, 'total': self.total}
+        if old_mb is not None:
+            data['old_mb'] = round(old_mb, 3)
+        if new_mb is not None:
+            data['new_mb'] = round(new_mb, 3)
+        if timings:
+            data['timings_ms'] = {operation: round(ms, 1) for operation, ms in timings.items()}
+        if message and status == 'error':
+            data['message'] = message
+        eta = self.eta()
+        if eta is not None:
+            data['eta_s'] = round(eta, 1)
+        self.event('image', **data)
+        self._draw()
+    
+    def error(self, message: str, **data):
+        self.event('error', stage=self.stage, message=message, **data)
+    
+    def output(self, path: str, kind: str):
+        self.event('output', path=path, kind=kind)
+    
+    def heartbeat(self, stage: str, **data):
+        """Signal that a stage is still running although nothing finished recently"""
+        self.event('heartbeat', stage=stage, elapsed=round(self._clock() - self.stage_started, 1), **data)
+    
+    def log(self, message: str):
+        """Print a console line without tearing the progress bar"""
+        self.clear_bar()
+        print(message)
+        self._draw(force=True)
+    
+    def rate(self) -> float:
+        elapsed = self._clock() - self.stage_started
+        return self.done / elapsed if elapsed > 0 else 0.0
+    
+    def eta(self) -> Optional[float]:
+        rate = self.rate()
+        if self.total is None or rate <= 0:
+            return None
+        return max(0.0, (self.total - self.done) / rate)
+    
+    def close(self, exit_code: int = 0):
+        self.clear_bar()
+        self.event('run_finish', exit_code=exit_code, elapsed=round(self._clock() - self.started, 3))
+    
+    def _draw(self, force: bool = False):
+        if not self.show_bar or self.stage is None:
+            return
+        now = self._clock()
+        if not force and now - self._last_draw < 0.1:
+            return
+        self._last_draw = now
+        elapsed = now - self.stage_started
+        saved_rate = self.saved_mb / elapsed if elapsed > 0 else 0.0
+        eta = self.eta()
+        eta_text = f"{int(eta // 60)}:{int(eta % 60):02d}" if eta is not None else "--:--"
+        if self.total:
+            filled = int(30 * min(self.done, self.total) / self.total)
+            counter = f"[{'#' * filled}{'.' * (30 - filled)}] {self.done}/{self.total}"
+        else:
+            counter = f"{self.done} images"
+        line = f"\r{self.stage}: {counter}  {self.rate():.1f} img/s  {saved_rate:.2f} MB/s saved  ETA {eta_text}"
+        if self.errors:
+            line += f"  errors: {self.errors}"
+        self.bar_stream.write(line + "\033[K")
+        self.bar_stream.flush()
+        self._bar_visible = True
+    
+    def clear_bar(self):
+        if self._bar_visible:
+            self.bar_stream.write("\r\033[K")
+            self.bar_stream.flush()
+            self._bar_visible = False
+
+class ImageJob:
+    """Settings of the image stage: optional enhancements and compression, applied in one decode"""
+    
+    def __init__(self, compress: bool = False, max_size_mb: float = 2.0, quality: int = None,
+                 auto_orient: bool = False, auto_contrast: bool = False, sharpen: bool = False,
+                 max_pixels: int = None):
+        self.compress = compress
+        self.max_size_mb = max_size_mb
+        self.quality = quality  # None: auto-optimize for max_size_mb
+        self.auto_orient = auto_orient
+        self.auto_contrast = auto_contrast
+        self.sharpen = sharpen
+        self.max_pixels = max_pixels  # longest edge in pixels
+    
+    @property
+    def enhance(self) -> bool:
+        return self.auto_orient or self.auto_contrast or self.sharpen or bool(self.max_pixels)
+    
+    @property
+    def active(self) -> bool:
+        return self.compress or self.enhance
+    
+    @property
+    def settings(self) -> str:
+        """Enhancement part of the photo index key (compression is keyed by size and quality)"""
+        parts = [name for name, enabled in (('orient', self.auto_orient), ('contrast', self.auto_contrast),
+                                            ('sharpen', self.sharpen)) if enabled]
+        if self.max_pixels:
+            parts.append(f"resize={self.max_pixels}")
+        return ",".join(parts)
+    
+    @property
+    def index_max_size(self) -> float:
+        return self.max_size_mb if self.compress else 0.0
+
+# EXIF tag holding the camera orientation (1 = upright)
+EXIF_ORIENTATION = 0x0112
+
+# JPEG qualities tried by the auto-quality search (highest first)
+AUTO_QUALITY_STEPS = list(range(95, 10, -5))
+
+def create_backup(input_path: str, refresh: bool = False) -> Optional[str]:
+    """Copy the original to <file>.backup unless a backup exists (or refresh replaces a stale one);
+    returns its path if written. The copy goes to a temporary file first, so a worker killed
+    mid-copy cannot leave a truncated backup that would block later backups."""
+    import shutil
+    backup_path = input_path + '.backup'
+    if os.path.exists(backup_path) and not refresh:
+        return None
+    tmp_path = backup_path + '.tmp'
+    shutil.copy2(input_path, tmp_path)
+    os.replace(tmp_path, backup_path)
+    return backup_path
+
+def run_image_job(input_path: str, job: ImageJob, from_backup: bool = False,
+                  refresh_backup: bool = False) -> dict:
+    """
+    Process one image: a single decode, the requested enhancements, in-memory encoding
+    (auto-quality uses a binary search over AUTO_QUALITY_STEPS) and a single write.
+    from_backup decodes <file>.backup (the verified original of a derivative) instead of the
+    file; refresh_backup replaces a stale backup (see backup_options).
+    Runs in pool workers, so nothing is printed; the caller reports the returned messages.
+    """
+    import io
+    import time
+    
+    name = os.path.basename(input_path)
+    timings: Dict[str, float] = {}
+    result = {'path': input_path, 'changed': False, 'status': 'skipped', 'messages': [], 'timings': timings}
     
     # Get current file size
     current_size = os.path.getsize(input_path) / (1024 * 1024)  # MB
+    result['old_size'] = result['new_size'] = current_size
     
-    if current_size <= max_size_mb:
-        print(f"OK {os.path.basename(input_path)}: {current_size:.1f}MB (no compression needed)")
-        return False
+    if not job.enhance and current_size <= job.max_size_mb:
+        result['status'] = 'ok'
+        result['messages'].append(f"OK {name}: {current_size:.1f}MB (no compression needed)")
+        return result
+    
+    Image = get_pil_image()
+    if Image is None:
+        result['messages'].append("WARNING: Compression requested but PIL/Pillow not available. Install with: pip install Pillow")
+        return result
+    from PIL import ImageFilter, ImageOps
+    
+    def timed(operation: str, func, *args, **kwargs):
+        started = time.perf_counter()
+        value = func(*args, **kwargs)
+        timings[operation] = timings.get(operation, 0.0) + (time.perf_counter() - started) * 1000
+        return value
     
     try:
-        # Create backup
         backup_path = input_path + '.backup'
-        if not os.path.exists(backup_path):
-            shutil.copy2(input_path, backup_path)
-            print(f"BACKUP created: {os.path.basename(backup_path)}")
-        
-        # Open image
-        with Image.open(input_path) as img:
-            # Convert to RGB if necessary (for JPEG compression)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                # Create white background for transparent images
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
+        
+        # Open image (the only decode). When the file is a derivative of its backup, a rerun
+        # starts from the original instead of enhancing an already enhanced file again
+        with Image.open(backup_path if from_backup else input_path) as source:
+            timed('decode', source.load)
+            img = source
+            # Keep the file's format (camera JPEGs are often detected as MPO); only JPEG is lossy
+            image_format = 'JPEG' if source.format in (None, 'JPEG', 'MPO') else source.format
+            exif = source.getexif()
+            modified = False
+            
+            # Orientation must be applied before the mode conversion drops the EXIF data
+            if job.auto_orient and exif.get(EXIF_ORIENTATION, 1) not in (None, 1):
+                img = timed('orient', ImageOps.exif_transpose, img)
+                exif[EXIF_ORIENTATION] = 1
+                modified = True
             
-            # If quality is specified, use it; otherwise optimize automatically
-            if quality is not None:
-                img.save(input_path, 'JPEG', quality=quality, optimize=True)
-                print(f"COMPRESSED {os.path.basename(input_path)}: {current_size:.1f}MB → {os.path.getsize(input_path) / (1024 * 1024):.1f}MB (quality: {quality})")
+            if image_format == 'JPEG':
+                # Convert to RGB if necessary (for JPEG compression)
+                if img.mode in ('RGBA', 'LA', 'P'):
+                    # Create white background for transparent images
+                    background = Image.new('RGB', img.size, (255, 255, 255))
+                    if img.mode == 'P':
+                        img = img.convert('RGBA')
+                    background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+                    img = background
+                elif img.mode != 'RGB':
+                    img = img.convert('RGB')
+            elif img.mode == 'P' and (job.auto_contrast or job.sharpen or job.max_pixels):
+                img = img.convert('RGBA')
+            
+            def on_color(func, image):
+                """Apply a filter to the colour channels only, keeping the alpha channel as is"""
+                if image.mode in ('RGBA', 'LA'):
+                    alpha = image.getchannel('A')
+                    image = func(image.convert(image.mode[:-1]))
+                    image.putalpha(alpha)
+                    return image
+                return func(image)
+            
+            if job.max_pixels and max(img.size) > job.max_pixels:
+                scale = job.max_pixels / max(img.size)
+                new_size = (max(1, round(img.size[0] * scale)), max(1, round(img.size[1] * scale)))
+                img = timed('resize', img.resize, new_size, Image.LANCZOS)
+                modified = True
+            if job.auto_contrast:
+                img = timed('contrast', on_color, lambda image: ImageOps.autocontrast(image, cutoff=0.5), img)
+                modified = True
+            if job.sharpen:
+                img = timed('sharpen', on_color,
+                            lambda image: image.filter(ImageFilter.UnsharpMask(radius=2, percent=80, threshold=3)), img)
+                modified = True
+            
+            if not modified and not (job.compress and current_size > job.max_size_mb):
+                # Nothing to do for this image: keep the file byte for byte
+                result['status'] = 'ok'
+                result['messages'].append(f"OK {name}: {current_size:.1f}MB (unchanged by {job.settings or 'these settings'})")
+                return result
+            
+            # EXIF (capture time, GPS) and colour profile survive the re-encode
+            save_options = {}
+            if len(exif) and image_format in ('JPEG', 'PNG', 'WEBP', 'TIFF'):
+                save_options['exif'] = exif.tobytes()
+            if source.info.get('icc_profile'):
+                save_options['icc_profile'] = source.info['icc_profile']
+            
+            encoded: Dict[int, bytes] = {}
+            def encode(quality: int) -> bytes:
+                if quality not in encoded:
+                    buffer = io.BytesIO()
+                    if image_format == 'JPEG':
+                        timed('encode', img.save, buffer, 'JPEG', quality=quality, optimize=True, **save_options)
+                    else:
+                        timed('encode', img.save, buffer, image_format, **save_options)
+                    encoded[quality] = buffer.getvalue()
+                return encoded[quality]
+            
+            max_bytes = job.max_size_mb * 1024 * 1024
+            if image_format != 'JPEG':
+                # Lossless formats have no quality knob: only resizing can make them smaller
+                data = encode(0)
+                quality_note = f"format: {image_format}"
+            elif job.quality is not None:
+                quality = job.quality
+                data = encode(quality)
+                quality_note = f"quality: {quality}"
+            elif job.compress:
+                # Highest quality step that meets the target size (sizes shrink with quality)
+                low, high = 0, len(AUTO_QUALITY_STEPS)
+                while low < high:
+                    middle = (low + high) // 2
+                    if len(encode(AUTO_QUALITY_STEPS[middle])) <= max_bytes:
+                        high = middle
+                    else:
+                        low = middle + 1
+                if low < len(AUTO_QUALITY_STEPS):
+                    data = encode(AUTO_QUALITY_STEPS[low])
+                    quality_note = f"quality: {AUTO_QUALITY_STEPS[low]}"
+                else:
+                    data = encode(10)
+                    quality_note = "min-quality: 10"
             else:
-                # Auto-quality optimization: start high, reduce until target size reached
-                quality = 95
-                while quality > 10:
-                    img.save(input_path, 'JPEG', quality=quality, optimize=True)
-                    new_size = os.path.getsize(input_path) / (1024 * 1024)
-                    
-                    if new_size <= max_size_mb:
-                        compression_ratio = (1 - new_size / current_size) * 100
-                        print(f"COMPRESSED {os.path.basename(input_path)}: {current_size:.1f}MB → {new_size:.1f}MB ({compression_ratio:.0f}% reduction, quality: {quality})")
-                        return True
-                    
-                    quality -= 5
-                
-                # Use lowest quality and report
-                img.save(input_path, 'JPEG', quality=10, optimize=True)
-                new_size = os.path.getsize(input_path) / (1024 * 1024)
-                compression_ratio = (1 - new_size / current_size) * 100
-                print(f"COMPRESSED {os.path.basename(input_path)}: {current_size:.1f}MB → {new_size:.1f}MB ({compression_ratio:.0f}% reduction, min-quality: 10)")
-                return True
+                data = encode(95)
+                quality_note = "quality: 95"
         
-        return True
+        if not modified and len(data) >= current_size * 1024 * 1024:
+            result['status'] = 'ok'
+            result['messages'].append(f"OK {name}: {current_size:.1f}MB (re-encoding would not make it smaller)")
+            return result
+        
+        # Create backup (only now that the file is really going to change)
+        if create_backup(input_path, refresh_backup):
+            result['messages'].append(f"BACKUP {'refreshed' if refresh_backup else 'created'}: {os.path.basename(backup_path)}")
+        
+        # Write into a temporary file and replace the original afterwards, so that
+        # hardlinked copies of this photo in other folders are never modified in place
+        tmp_path = input_path + '.tmp'
+        def write():
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, input_path)
+        timed('write', write)
+        
+        new_size = len(data) / (1024 * 1024)
+        compression_ratio = (1 - new_size / current_size) * 100
+        result['changed'] = True
+        result['new_size'] = new_size
+        result['status'] = 'compressed' if job.compress else 'enhanced'
+        action = "COMPRESSED" if job.compress else "ENHANCED"
+        if compression_ratio >= 0:
+            details = f"{compression_ratio:.0f}% reduction, {quality_note}"
+        else:
+            details = f"{-compression_ratio:.0f}% larger, {quality_note}"
+        if job.settings:
+            details += f", {job.settings}"
+        result['messages'].append(f"{action} {name}: {current_size:.1f}MB → {new_size:.1f}MB ({details})")
         
     except Exception as e:
-        print(f"ERROR compressing {input_path}: {e}")
-        return False
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+        result['messages'].append(f"ERROR compressing {input_path}: {e}")
+    
+    return result
+
+def backup_options(index: PhotoIndex, input_path: str, file_hash: str, source_hash: str) -> dict:
+    """
+    How run_image_job treats an existing <file>.backup. It is decoded only when the index
+    records the current file as a derivative of the backup's content; when the current file
+    is an original the backup does not match (the photo was replaced), it is refreshed.
+    Without an index nothing can be verified, so the file is decoded and the backup kept.
+    """
+    backup_path = input_path + '.backup'
+    if not os.path.exists(backup_path):
+        return {}
+    backup_hash = index.file_hash(backup_path)
+    if file_hash != source_hash:
+        return {'from_backup': source_hash == backup_hash}
+    return {'refresh_backup': file_hash != backup_hash}
+
+def failed_image_result(input_path: str, error: str) -> dict:
+    """Result for an image task that did not return (exception outside the job, timeout, dead worker)"""
+    return {'path': input_path, 'changed': False, 'status': 'error', 'timings': {}, 'error': error,
+            'messages': [f"ERROR processing {input_path}: {error}"]}
+
+def image_worker(conn):
+    """Worker process of ImageTaskRunner: run image jobs received over the pipe until it closes"""
+    while True:
+        try:
+            input_path, job, options = conn.recv()
+        except (EOFError, OSError):
+            break
+        try:
+            result = run_image_job(input_path, job, **options)
+        except Exception as e:
+            result = failed_image_result(input_path, f"{type(e).__name__}: {e}")
+        conn.send(result)
+
+class ImageTaskRunner:
+    """
+    Runs image jobs in isolated worker processes, each task with a timeout. A worker that
+    hangs (e.g. a decoder stuck on a malformed file) or dies is terminated and replaced;
+    only its task fails. Failed tasks are retried up to `retries` times at the end of the
+    queue, so one bad file does not hold up the others.
+    """
+    
+    def __init__(self, workers: int = 1, timeout: float = None, retries: int = 0):
+        import time
+        self._clock = time.monotonic
+        self.workers = max(1, workers)
+        self.timeout = timeout or None
+        self.retries = max(0, retries)
+        self.queue = []      # (input_path, job, key, attempt, options), consumed from the front
+        self.idle = []       # (process, conn)
+        self.busy = {}       # conn -> ((process, conn), task, started)
+        self.failures: List[dict] = []
+    
+    def submit(self, input_path: str, job: ImageJob, key=None, options: dict = None):
+        """Queue a job; options are passed to run_image_job as keyword arguments"""
+        self.queue.append((input_path, job, key, 1, options or {}))
+        self._dispatch()
+    
+    def pending(self) -> int:
+        return len(self.queue) + len(self.busy)
+    
+    def poll(self, timeout: float = 0.0) -> List[Tuple[dict, object]]:
+        """Collect finished tasks as (result, key), waiting up to timeout seconds for one"""
+        from multiprocessing.connection import wait
+        finished = []
+        if self.busy:
+            if self.timeout is not None:
+                now = self._clock()
+                next_deadline = min(started + self.timeout for _, _, started in self.busy.values())
+                timeout = max(0.0, min(timeout, next_deadline - now))
+            for conn in wait(list(self.busy), timeout):
+                worker, task, started = self.busy.pop(conn)
+                try:
+                    result = conn.recv()
+                except (EOFError, OSError):
+                    worker[0].join(1)
+                    self._discard(worker)
+                    result = failed_image_result(task[0], f"worker exited unexpectedly (exit code {worker[0].exitcode})")
+                else:
+                    self.idle.append(worker)
+                self._settle(task, result, finished)
+            if self.timeout is not None:
+                now = self._clock()
+                for conn, (worker, task, started) in list(self.busy.items()):
+                    if now - started > self.timeout:
+                        del self.busy[conn]
+                        self._discard(worker)
+                        self._settle(task, failed_image_result(task[0], f"timed out after {self.timeout:g}s"), finished)
+        self._dispatch()
+        return finished
+    
+    def close(self):
+        for worker in self.idle:
+            worker[1].close()
+            worker[0].join(5)
+        for worker in self.idle + [worker for worker, _, _ in self.busy.values()]:
+            self._discard(worker)
+        self.idle, self.busy = [], {}
+    
+    def _dispatch(self):
+        while self.queue and (self.idle or len(self.busy) < self.workers):
+            worker = self.idle.pop() if self.idle else self._start_worker()
+            task = self.queue.pop(0)
+            try:
+                worker[1].send((task[0], task[1], task[4]))
+            except (OSError, ValueError):
+                # Worker died while idle: replace it and try again
+                self._discard(worker)
+                self.queue.insert(0, task)
+                continue
+            self.busy[worker[1]] = (worker, task, self._clock())
+    
+    def _start_worker(self):
+        import multiprocessing
+        parent_conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=image_worker, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+    
+    def _discard(self, worker):
+        process, conn = worker
+        if process.is_alive():
+            process.terminate()
+            process.join(2)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        conn.close()
+    
+    def _settle(self, task, result: dict, finished: list):
+        input_path, job, key, attempt, options = task
+        if result['status'] == 'error' and attempt <= self.retries:
+            self.queue.append((input_path, job, key, attempt + 1, options))
+            return
+        result['attempts'] = attempt
+        if attempt > 1:
+            outcome = "failed" if result['status'] == 'error' else "succeeded"
+            result['messages'].append(f"RETRY {os.path.basename(input_path)}: {outcome} after {attempt} attempts")
+        if result['status'] == 'error':
+            self.failures.append({'stage': 'images', 'path': input_path, 'attempts': attempt,
+                                  'error': result.get('error', result['messages'][-1])})
+        finished.append((result, key))
+
+def reuse_indexed_derivative(input_path: str, job: ImageJob, index: PhotoIndex, source_hash: str,
+                             refresh_backup: bool = False) -> Optional[dict]:
+    """If the index knows a derivative of this photo made with the same job, link it in place.
+    Returns a result like run_image_job, or None if the image has to be processed"""
+    current_size = os.path.getsize(input_path) / (1024 * 1024)
+    if not job.enhance and current_size <= job.max_size_mb:
+        return None
+    if index.is_derivative(input_path, source_hash, job.index_max_size, job.quality, job.settings):
+        return {'path': input_path, 'changed': False, 'status': 'ok', 'timings': {},
+                'old_size': current_size, 'new_size': current_size,
+                'messages': [f"OK {os.path.basename(input_path)}: {current_size:.1f}MB (already processed with these settings)"]}
+    derivative_path = index.find_derivative(source_hash, job.index_max_size, job.quality, input_path, job.settings)
+    if derivative_path is None:
+        return None
+    
+    messages = []
+    backup_path = create_backup(input_path, refresh_backup)
+    if backup_path:
+        messages.append(f"BACKUP {'refreshed' if refresh_backup else 'created'}: {os.path.basename(backup_path)}")
+    reuse_derivative(input_path, derivative_path)
+    new_size = os.path.getsize(input_path) / (1024 * 1024)
+    messages.append(f"REUSED {os.path.basename(input_path)}: {current_size:.1f}MB → {new_size:.1f}MB (from {derivative_path})")
+    return {'path': input_path, 'changed': True, 'status': 'reused', 'messages': messages, 'timings': {},
+            'old_size': current_size, 'new_size': new_size}
+
+def finish_image_job(result: dict, job: ImageJob, index: PhotoIndex = None, source_hash: str = None,
+                     timing_totals: Dict[str, List[float]] = None, reporter: ProgressReporter = None):
+    """Report a job result in the main process and record the derivative in the index"""
+    for message in result['messages']:
+        if reporter is not None:
+            reporter.log(message)
+        else:
+            print(message)
+    if reporter is not None:
+        reporter.image_done(result['path'], result['status'], result.get('old_size'), result.get('new_size'),
+                            result['timings'], result.get('error'))
+    if result['changed'] and index is not None and source_hash:
+        index.add_derivative(source_hash, job.index_max_size, job.quality, result['path'], job.settings)
+    if timing_totals is not None:
+        for operation, milliseconds in result['timings'].items():
+            totals = timing_totals.setdefault(operation, [0.0, 0])
+            totals[0] += milliseconds
+            totals[1] += 1
 
-def find_images_in_directory(directory: str, compress: bool = False, max_size_mb: float = 2.0, quality: int = 85) -> List[WalkImage]:
-    """Find all images in directory (including those without date-time)"""
+def print_timing_summary(timing_totals: Dict[str, List[float]]):
+    """Per-operation cost of the image stage (summed over all workers)"""
+    if not timing_totals:
+        return
+    print("Image processing time per operation:")
+    for operation in ('decode', 'orient', 'resize', 'contrast', 'sharpen', 'encode', 'write'):
+        if operation in timing_totals:
+            total_ms, count = timing_totals[operation]
+            print(f"  {operation:<9} {total_ms:>9.0f}ms total, {total_ms / count:>7.1f}ms per image ({count} images)")
+
+def scan_image_files(directory: str, recursive: bool = False,
+                     include: List[str] = None, exclude: List[str] = None) -> Iterator[str]:
+    """
+    Yield image paths relative to directory (with '/' separators) as they are found.
+    Uses os.scandir, so file type checks come from the directory listing without extra
+    stat calls. Entries are sorted per directory for a stable order; hidden folders are
+    skipped. Symlinked folders are followed, but each folder is read only once, so
+    links pointing back up the tree cannot loop. include/exclude are glob patterns
+    matched against the relative path and the file name; backup and temporary files
+    of the compressor are always ignored.
+    """
+    from fnmatch import fnmatch
+    
+    def matches(rel_path: str, name: str, patterns: List[str]) -> bool:
+        return any(fnmatch(rel_path, pattern) or fnmatch(name, pattern) for pattern in patterns)
+    
+    pending = [(directory, '')]
+    visited = set()  # (st_dev, st_ino) of folders already read
+    while pending:
+        current_dir, prefix = pending.pop(0)
+        try:
+            stat = os.stat(current_dir)
+            if (stat.st_dev, stat.st_ino) in visited:
+                continue
+            visited.add((stat.st_dev, stat.st_ino))
+            with os.scandir(current_dir) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"WARNING: Cannot read folder {current_dir}: {e}")
+            continue
+        
+        subdirs = []
+        for entry in entries:
+            rel_path = prefix + entry.name
+            if entry.is_dir():
+                if recursive and not entry.name.startswith('.'):
+                    subdirs.append((entry.path, rel_path + '/'))
+                continue
+            if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS or not entry.is_file():
+                continue
+            if include and not matches(rel_path, entry.name, include):
+                continue
+            if exclude and matches(rel_path, entry.name, exclude):
+                continue
+            yield rel_path
+        pending[0:0] = subdirs  # depth-first, keeps folder contents together
+
+def find_images_in_directory(directory: str, compress: bool = False, max_size_mb: float = 2.0, quality: int = 85,
+                             index: PhotoIndex = None, recursive: bool = False,
+                             include: List[str] = None, exclude: List[str] = None,
+                             image_job: ImageJob = None, workers: int = 1,
+                             reporter: ProgressReporter = None, task_timeout: float = 0,
+                             retries: int = 0, failures: List[dict] = None) -> List[WalkImage]:
+    """Find all images in directory (including those without date-time).
+    Each image is parsed as soon as the scanner yields it; compression/enhancement
+    (image_job, or the compress arguments) runs in isolated worker processes when
+    workers > 1 or a task_timeout is set (see ImageTaskRunner). Images that still fail
+    after the retries are appended to failures."""
     images = []
-    image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
-    
-    for filename in os.listdir(directory):
-        if any(filename.lower().endswith(ext) for ext in image_extensions):
-            filepath = os.path.join(directory, filename)
-            if os.path.isfile(filepath):
-                # Extract date-time from filename
-                datetime_obj, time_string, elevation_string = extract_timestamp_info(filename)
-                
-                # Extract coordinates if available (optional now)
-                coordinates = extract_coordinates_from_filename(filename)
-                
-                # Only process images if compression is enabled
-                if compress:
-                    # Pass quality only if explicitly specified, otherwise auto-optimize
-                    compress_image(filepath, max_size_mb, quality if quality != 85 else None)
-                
-                # Create image object - now processes ALL images regardless of datetime
-                walk_image = WalkImage(filename, datetime_obj, coordinates)
-                images.append(walk_image)
+    if image_job is None:
+        # Pass quality only if explicitly specified, otherwise auto-optimize
+        image_job = ImageJob(compress=compress, max_size_mb=max_size_mb,
+                             quality=quality if quality != 85 else None)
+    
+    timing_totals: Dict[str, List[float]] = {}
+    runner = None
+    if image_job.active and (workers > 1 or task_timeout):
+        runner = ImageTaskRunner(workers, task_timeout, retries)
+    
+    try:
+        for rel_path in scan_image_files(directory, recursive, include, exclude):
+            filepath = os.path.join(directory, rel_path)
+            filename = os.path.basename(rel_path)
+            
+            # Extract date-time from filename
+            datetime_obj, time_string, elevation_string = extract_timestamp_info(filename)
+            
+            # Extract coordinates if available (optional now)
+            coordinates = extract_coordinates_from_filename(filename)
+            
+            # Create image object - now processes ALL images regardless of datetime
+            walk_image = WalkImage(rel_path, datetime_obj, coordinates)
+            images.append(walk_image)
+            
+            # Hash the original before compression changes it (derivatives map back to their original)
+            options = {}
+            if index is not None:
+                try:
+                    if image_job.active:
+                        file_hash = index.file_hash(filepath)
+                        walk_image.content_hash = index.original_hash(file_hash)
+                        options = backup_options(index, filepath, file_hash, walk_image.content_hash)
+                    else:
+                        # Reading every photo just for report membership is too slow on large or
+                        # network folders: use a hash known from earlier runs, else a path key
+                        known_hash = index.known_hash(filepath)
+                        walk_image.content_hash = index.original_hash(known_hash) if known_hash else None
+                    walk_image.index_key = walk_image.content_hash or index.path_key(filepath)
+                    index.record_photo(walk_image.index_key, walk_image)
+                except Exception as e:
+                    # e.g. the file vanished after the listing (sync and network folders): record it, keep going
+                    result = failed_image_result(filepath, f"{type(e).__name__}: {e}")
+                    if failures is not None:
+                        failures.append({'stage': 'images', 'path': filepath, 'attempts': 1, 'error': result['error']})
+                    finish_image_job(result, image_job, None, None, timing_totals, reporter)
+                    walk_image.content_hash = walk_image.index_key = None
+                    if not os.path.exists(filepath):
+                        images.pop()  # nothing left to show in the report
+                    continue
+            
+            # Only process images if compression or enhancement is enabled
+            if not image_job.active:
+                continue
+            if index is not None:
+                try:
+                    result = reuse_indexed_derivative(filepath, image_job, index, walk_image.content_hash,
+                                                      options.get('refresh_backup', False))
+                except Exception as e:
+                    # e.g. disk full or no permission while linking: record it, keep going
+                    result = failed_image_result(filepath, f"{type(e).__name__}: {e}")
+                    if failures is not None:
+                        failures.append({'stage': 'images', 'path': filepath, 'attempts': 1, 'error': result['error']})
+                if result is not None:
+                    finish_image_job(result, image_job, index, walk_image.content_hash, timing_totals, reporter)
+                    continue
+            if runner is not None:
+                runner.submit(filepath, image_job, walk_image.content_hash, options)
+                # Report what has finished meanwhile without blocking the scan
+                for result, source_hash in runner.poll():
+                    finish_image_job(result, image_job, index, source_hash, timing_totals, reporter)
+            else:
+                try:
+                    result = run_image_job(filepath, image_job, **options)
+                except Exception as e:
+                    result = failed_image_result(filepath, f"{type(e).__name__}: {e}")
+                if result['status'] == 'error' and failures is not None:
+                    failures.append({'stage': 'images', 'path': filepath, 'attempts': 1,
+                                     'error': result.get('error', result['messages'][-1])})
+                finish_image_job(result, image_job, index, walk_image.content_hash, timing_totals, reporter)
+        
+        # Scan complete: the total is known now, so the progress bar can show an ETA
+        if reporter is not None and image_job.active:
+            reporter.set_total(len(images))
+        
+        while runner is not None and runner.pending():
+            finished = runner.poll(timeout=5.0)
+            if not finished and reporter is not None:
+                # Nothing finished for a while: tell a slow run from a hung one
+                reporter.heartbeat('images', running=len(runner.busy), queued=len(runner.queue))
+            for result, source_hash in finished:
+                finish_image_job(result, image_job, index, source_hash, timing_totals, reporter)
+    finally:
+        if runner is not None:
+            runner.close()
+            if failures is not None:
+                failures.extend(runner.failures)
+    
+    if index is not None:
+        index.conn.commit()
+    
+    if reporter is not None:
+        reporter.clear_bar()
+    print_timing_summary(timing_totals)
     
     return images
 
@@ -397,86 +1353,383 @@ def sort_images_by_datetime(images: List[WalkImage]) -> List[WalkImage]:
     # Return: images without datetime first, then sorted images with datetime
     return images_without_datetime + sorted_with_datetime
 
-def generate_markdown_content(images: List[WalkImage], title: str = "Begehungsbericht", 
-                            date: str = "DD-MM-YYYY", location: str = "Gebiet", 
-                            template_path: str = None) -> str:
-    """Generate complete markdown document using templates"""
+class WalkSection:
+    """A contiguous part of a walk, separated from its neighbours by a time gap or spatial jump"""
+    
+    def __init__(self, number: int, first_figure: int):
+        self.number = number
+        self.first_figure = first_figure  # figure number of the first image (1-based, document-wide)
+        self.images: List[WalkImage] = []
+        self.distance = 0.0  # km along the chronological route inside the section
+        self.lead_in_distance = 0.0  # km walked from the previous section (split by a time gap only)
+        self.min_elevation: Optional[int] = None
+        self.max_elevation: Optional[int] = None
+        self.start: Optional[datetime] = None
+        self.end: Optional[datetime] = None
+        self._last_coordinates: Optional[Tuple[float, float]] = None
+    
+    def add(self, image: WalkImage):
+        """Append an image and update the running statistics"""
+        self.images.append(image)
+        if image.coordinates:
+            if self._last_coordinates:
+                self.distance += haversine_distance(self._last_coordinates, image.coordinates)
+            self._last_coordinates = image.coordinates
+        if image.elevation is not None:
+            if self.min_elevation is None or image.elevation < self.min_elevation:
+                self.min_elevation = image.elevation
+            if self.max_elevation is None or image.elevation > self.max_elevation:
+                self.max_elevation = image.elevation
+        if image.datetime:
+            if self.start is None:
+                self.start = image.datetime
+            self.end = image.datetime
+    
+    def time_span(self, lang: str = DEFAULT_LANG) -> str:
+        """Human readable time span, e.g. '04.08.2025 14:09–14:52'"""
+        if self.start is None:
+            return msg('no_timestamp', lang)
+        date_format = msg('date_format', lang)
+        if self.start.date() == self.end.date():
+            return f"{self.start.strftime(date_format + ' %H:%M')}–{self.end.strftime('%H:%M')}"
+        return f"{self.start.strftime(date_format + ' %H:%M')} – {self.end.strftime(date_format + ' %H:%M')}"
+    
+    @property
+    def elevation_range(self) -> str:
+        """Elevation range in meters, e.g. '930–1002 m'"""
+        if self.min_elevation is None:
+            return "N/A"
+        if self.min_elevation == self.max_elevation:
+            return f"{self.min_elevation} m"
+        return f"{self.min_elevation}–{self.max_elevation} m"
+    
+    def heading(self, lang: str = DEFAULT_LANG) -> str:
+        return f"{msg('section', lang)} {self.number} ({self.time_span(lang)})"
+    
+    def summary(self, lang: str = DEFAULT_LANG) -> str:
+        """One-line statistics used in the section overview and below the section heading"""
+        distance = f"{self.distance:.2f} km" if self.distance > 0 else "N/A"
+        count = msg('images_one' if len(self.images) == 1 else 'images_many', lang, count=len(self.images))
+        return msg('section_summary', lang, images=count, distance=distance, elevation=self.elevation_range)
+
+def segment_images_into_sections(sorted_images: List[WalkImage],
+                                 gap_minutes: float = DEFAULT_SECTION_GAP_MINUTES,
+                                 jump_km: float = DEFAULT_SECTION_JUMP_KM) -> List[WalkSection]:
+    """
+    Split chronologically sorted images into sections in one linear pass.
+    A new section starts when the time gap to the previous timestamped image exceeds
+    gap_minutes or the distance to the previous located image exceeds jump_km.
+    Images without timestamp (sorted first) belong to the first section. The leg into
+    a section that was split off by a time gap only still counts as walked (lead_in_distance).
+    """
+    sections: List[WalkSection] = []
+    current = None
+    last_datetime = None
+    last_coordinates = None
+    section_located = False
+    
+    for index, image in enumerate(sorted_images, 1):
+        split = current is None
+        leg = None
+        if image.coordinates and last_coordinates:
+            leg = haversine_distance(last_coordinates, image.coordinates)
+        if current is not None:
+            if image.datetime and last_datetime and (image.datetime - last_datetime).total_seconds() > gap_minutes * 60:
+                split = True
+            elif leg is not None and leg > jump_km:
+                split = True
+        
+        if split:
+            current = WalkSection(len(sections) + 1, index)
+            sections.append(current)
+            section_located = False
+        
+        if image.coordinates:
+            if not section_located and leg is not None and leg <= jump_km:
+                current.lead_in_distance = leg
+            section_located = True
+        current.add(image)
+        if image.datetime:
+            last_datetime = image.datetime
+        if image.coordinates:
+            last_coordinates = image.coordinates
     
-    # Load template
-    template = load_template(template_path)
+    return sections
+
+class ReportFigure:
+    """One numbered figure of a report"""
+    
+    def __init__(self, number: int, image: WalkImage, section_number: int):
+        self.number = number
+        self.image = image
+        self.section_number = section_number
+        self._size: Optional[Tuple[int, int]] = None
+        self._size_checked = False
+        self.size_error: Optional[str] = None  # why the image could not be analysed
+    
+    @property
+    def caption(self) -> str:
+        return self.image.caption
+    
+    def get_caption(self, lang: str = DEFAULT_LANG) -> str:
+        return self.image.get_caption(lang)
+    
+    @property
+    def size(self) -> Optional[Tuple[int, int]]:
+        """Pixel size (width, height), or None if the image cannot be analysed (see size_error)"""
+        if not self._size_checked:
+            self._size_checked = True
+            if get_pil_image() is None:
+                return None  # Pillow is optional: figures simply get no ratio/orientation
+            try:
+                self._size = get_image_size(self.image.filename)
+                if not self._size[1]:
+                    raise ValueError("image has no height")
+            except (OSError, ValueError, ZeroDivisionError) as e:
+                self._size = None
+                self.size_error = f"{type(e).__name__}: {e}"
+                print(f"WARNING: Could not read image size of {self.image.filename}: {e}")
+        return self._size
+    
+    @property
+    def ratio(self) -> Optional[float]:
+        return self.size[0] / self.size[1] if self.size else None
+    
+    @property
+    def orientation(self) -> Optional[str]:
+        if not self.size:
+            return None
+        return 'landscape' if self.size[0] > self.size[1] else 'portrait'
+
+class WalkReport:
+    """
+    Structured report model: sections, numbered figures, route statistics and bounds.
+    All renderers (markdown, HTML, JSON, GeoJSON) work from this model.
+    """
     
+    def __init__(self, sections: List[WalkSection], title: str = "Begehungsbericht",
+                 date: str = "DD-MM-YYYY", location: str = "Gebiet", single_section: bool = False):
+        self.title = title
+        self.date = date
+        self.location = location
+        self.sections = sections
+        self.single_section = single_section  # report renders one section of a larger walk
+        self.figures = [ReportFigure(number, image, section.number)
+                        for section in sections
+                        for number, image in enumerate(section.images, section.first_figure)]
+        
+        # Total distance follows the route; only spatial jumps between sections are left out
+        self.total_distance = (sum(section.distance for section in sections)
+                               + sum(section.lead_in_distance for section in sections[1:]))
+        
+        located = [figure.image.coordinates for figure in self.figures if figure.image.coordinates]
+        if located:
+            self.bounds = (min(c[0] for c in located), min(c[1] for c in located),
+                           max(c[0] for c in located), max(c[1] for c in located))
+        else:
+            self.bounds = None
+        
+        file_extensions = {os.path.splitext(figure.image.filename)[1].lower() for figure in self.figures}
+        self.file_format = ", ".join(sorted(file_extensions)) if file_extensions else "Unknown"
+    
+    @property
+    def show_section_headings(self) -> bool:
+        return len(self.sections) > 1 or self.single_section
+    
+    def to_dict(self, lang: str = DEFAULT_LANG) -> dict:
+        """Compact JSON-serializable representation (headings and captions in the given language)"""
+        return {
+            'title': self.title,
+            'lang': lang,
+            'date': self.date,
+            'location': self.location,
+            'stats': {
+                'images': len(self.figures),
+                'sections': len(self.sections),
+                'distance_km': round(self.total_distance, 3),
+            },
+            'bounds': list(self.bounds) if self.bounds else None,
+            'sections': [{
+                'number': section.number,
+                'heading': section.heading(lang),
+                'start': section.start.isoformat() if section.start else None,
+                'end': section.end.isoformat() if section.end else None,
+                'distance_km': round(section.distance, 3),
+                'elevation': [section.min_elevation, section.max_elevation] if section.min_elevation is not None else None,
+                'figures': [section.first_figure, section.first_figure + len(section.images) - 1],
+            } for section in self.sections],
+            'figures': [{
+                'number': figure.number,
+                'file': figure.image.filename,
+                'caption': figure.get_caption(lang),
+                'section': figure.section_number,
+                'taken': figure.image.datetime.isoformat() if figure.image.datetime else None,
+                'coordinates': list(figure.image.coordinates) if figure.image.coordinates else None,
+                'elevation': figure.image.elevation,
+                'size': list(figure.size) if figure.size else None,
+            } for figure in self.figures],
+        }
+    
+    def to_geojson(self, lang: str = DEFAULT_LANG) -> dict:
+        """GeoJSON FeatureCollection: one Point per located figure and one LineString per section route"""
+        features = []
+        routes: Dict[int, List[List[float]]] = {}
+        for figure in self.figures:
+            if not figure.image.coordinates:
+                continue
+            position = [figure.image.coordinates[0], figure.image.coordinates[1]]
+            routes.setdefault(figure.section_number, []).append(position)
+            features.append({
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': position},
+                'properties': {
+                    'figure': figure.number,
+                    'file': figure.image.filename,
+                    'caption': figure.get_caption(lang),
+                    'section': figure.section_number,
+                    'taken': figure.image.datetime.isoformat() if figure.image.datetime else None,
+                    'elevation': figure.image.elevation,
+                },
+            })
+        for section in self.sections:
+            route = routes.get(section.number, [])
+            if len(route) > 1:
+                features.append({
+                    'type': 'Feature',
+                    'geometry': {'type': 'LineString', 'coordinates': route},
+                    'properties': {
+                        'section': section.number,
+                        'heading': section.heading(lang),
+                        'distance_km': round(section.distance, 3),
+                    },
+                })
+        collection = {'type': 'FeatureCollection', 'features': features}
+        if self.bounds:
+            collection['bbox'] = list(self.bounds)
+        return collection
+
+def build_report(images: List[WalkImage], title: str = "Begehungsbericht",
+                 date: str = "DD-MM-YYYY", location: str = "Gebiet",
+                 gap_minutes: float = DEFAULT_SECTION_GAP_MINUTES,
+                 jump_km: float = DEFAULT_SECTION_JUMP_KM,
+                 section_number: int = None) -> WalkReport:
+    """Sort, segment and number the images (optionally keeping a single section only)"""
     # Sort images by date-time first (chronological order)
     sorted_images = sort_images_by_datetime(images)
     
-    # Calculate total distance along the chronological route (if coordinates available)
-    total_distance = 0
-    images_with_coordinates = [img for img in sorted_images if img.coordinates]
-    if len(images_with_coordinates) > 1:
-        for i in range(len(images_with_coordinates) - 1):
-            distance = haversine_distance(
-                (images_with_coordinates[i].coordinates[0], images_with_coordinates[i].coordinates[1]),
-                (images_with_coordinates[i+1].coordinates[0], images_with_coordinates[i+1].coordinates[1])
-            )
-            total_distance += distance
-    else:
-        total_distance = 0
-    
-    # Generate content section with proper markdown formatting
-    content = ""
-    
-    for i, image in enumerate(sorted_images, 1):
-        # Standard markdown: image with caption as emphasized text below, including figure counter
-        content += f"![{image.caption}](./{image.filename})\n*Abb. {i}: {image.caption}*\n\n"
+    # Split into walk sections (time gaps / spatial jumps)
+    sections = segment_images_into_sections(sorted_images, gap_minutes, jump_km)
+    if section_number is not None:
+        sections = [section for section in sections if section.number == section_number]
     
-    # Generate coordinates list (in chronological order) if available
+    return WalkReport(sections, title, date, location, single_section=section_number is not None)
+
+def get_template_values(report: WalkReport, lang: str = DEFAULT_LANG) -> dict:
+    """Template variables shared by the markdown and HTML renderers (everything except content)"""
+    # Overview of all sections for templates that reference {sections_overview}
+    sections_overview = ""
+    for section in report.sections:
+        sections_overview += f"- {section.heading(lang)}: {section.summary(lang)}\n"
+    
+    # Generate coordinates list (in chronological order) if available, keeping document-wide numbers
     coordinates_list = ""
-    if sorted_images and all(img.coordinates for img in sorted_images):
-        for i, image in enumerate(sorted_images, 1):
-            coordinates_list += f"- Bild {i}: {image.coordinates[0]:.6f}°E, {image.coordinates[1]:.6f}°N\n"
-    else:
-        # Include all images, marking those without coordinates
-        for i, image in enumerate(sorted_images, 1):
-            if image.coordinates:
-                coordinates_list += f"- Bild {i}: {image.coordinates[0]:.6f}°E, {image.coordinates[1]:.6f}°N\n"
-            else:
-                coordinates_list += f"- Bild {i}: Koordinaten nicht verfügbar\n"
+    image_label = msg('image', lang)
+    for figure in report.figures:
+        if figure.image.coordinates:
+            coordinates_list += f"- {image_label} {figure.number}: {figure.image.coordinates[0]:.6f}°E, {figure.image.coordinates[1]:.6f}°N\n"
+        else:
+            coordinates_list += f"- {image_label} {figure.number}: {msg('coordinates_unavailable', lang)}\n"
     
     # Calculate coordinate bounds for scientific template (if coordinates available)
-    images_with_coordinates = [img for img in sorted_images if img.coordinates]
-    if images_with_coordinates:
-        min_lon = min(img.coordinates[0] for img in images_with_coordinates)
-        max_lon = max(img.coordinates[0] for img in images_with_coordinates)
-        min_lat = min(img.coordinates[1] for img in images_with_coordinates)
-        max_lat = max(img.coordinates[1] for img in images_with_coordinates)
+    if report.bounds:
+        min_lon, min_lat, max_lon, max_lat = report.bounds
         coordinate_bounds = f"{min_lon:.4f}°E - {max_lon:.4f}°E, {min_lat:.4f}°N - {max_lat:.4f}°N"
     else:
         coordinate_bounds = "N/A"
     
-    # Detect file extensions from images
-    file_extensions = set()
-    for image in sorted_images:
-        ext = os.path.splitext(image.filename)[1].lower()
-        file_extensions.add(ext)
-    
-    if file_extensions:
-        file_format = ", ".join(sorted(file_extensions))
-    else:
-        file_format = "Unknown"
-    
-    # Fill template variables
-    markdown = template.format(
-        title=title,
-        date=date,
-        location=location,
-        content=content,
-        total_images=len(sorted_images),
-        total_distance=f"{total_distance:.2f}" if total_distance > 0 else "N/A",
+    return dict(
+        title=report.title,
+        date=report.date,
+        location=report.location,
+        total_images=len(report.figures),
+        total_distance=f"{report.total_distance:.2f}" if report.total_distance > 0 else "N/A",
         coordinates_list=coordinates_list,
         coordinate_bounds=coordinate_bounds,
-        file_format=file_format
+        total_sections=len(report.sections),
+        sections_overview=sections_overview,
+        file_format=report.file_format
     )
 
-    return markdown
+def render_markdown(report: WalkReport, template: str, lang: str = DEFAULT_LANG) -> str:
+    """Render the report into the markdown template"""
+    # Generate content section with proper markdown formatting
+    content = ""
+    figure_label = msg('figure', lang)
+    
+    for section in report.sections:
+        if report.show_section_headings:
+            content += f"## {section.heading(lang)}\n\n{section.summary(lang)}\n\n"
+        for figure in report.figures:
+            if figure.section_number == section.number:
+                # Standard markdown: image with caption as emphasized text below, including figure counter
+                caption = figure.get_caption(lang)
+                content += f"![{caption}](./{figure.image.filename})\n*{figure_label} {figure.number}: {caption}*\n\n"
+    
+    return template.format(content=content, **get_template_values(report, lang))
+
+def figure_open_tag(img_path: str, alt: str, ratio: Optional[float], orientation: Optional[str]) -> str:
+    """Opening <figure> and <img> markup; ratio and orientation drive the print CSS"""
+    if ratio is None:
+        # Fallback if image analysis fails
+        return f'<figure><img src="{img_path}" alt="{alt}" class="walk-image">'
+    return f'<figure data-ratio="{ratio:.4f}"><img src="{img_path}" alt="{alt}" class="walk-image {orientation}">'
+
+def render_figure_html(figure: ReportFigure, lang: str = DEFAULT_LANG) -> str:
+    """Complete <figure> element with numbered caption"""
+    caption = figure.get_caption(lang)
+    return (figure_open_tag(f"./{figure.image.filename}", caption, figure.ratio, figure.orientation)
+            + f'<figcaption><strong>{msg("figure", lang)} {figure.number}:</strong> {caption}</figcaption></figure>')
+
+def render_report_html(report: WalkReport, template: str, layout: 'PrintLayout' = None,
+                       lang: str = DEFAULT_LANG) -> str:
+    """
+    Render the report as HTML body content. Only the template text goes through the
+    markdown converter; figures and section headings are rendered from the model.
+    With a print layout the figures are packed into pre-paginated pages.
+    """
+    placeholder = "WIP-REPORT-CONTENT-PLACEHOLDER"
+    html_content = convert_markdown_to_html(template.format(content=placeholder, **get_template_values(report, lang)))
+    
+    blocks: List[Tuple[str, bool]] = []  # (html, is_figure)
+    for section in report.sections:
+        if report.show_section_headings:
+            heading = section.heading(lang)
+            blocks.append((f'<h2 data-content="{heading}">{heading}</h2>', False))
+            blocks.append((section.summary(lang), False))
+        for figure in report.figures:
+            if figure.section_number == section.number:
+                blocks.append((render_figure_html(figure, lang), True))
+    
+    if layout is not None:
+        content = '\n\n'.join(pack_figure_pages(blocks, layout))
+    else:
+        content = '\n\n'.join(block for block, _ in blocks)
+    
+    return html_content.replace(placeholder, content, 1)
+
+def write_report_exports(report: WalkReport, output_path: str, formats: List[str],
+                         lang: str = DEFAULT_LANG) -> List[str]:
+    """Write the report model as .json and/or .geojson next to output_path. Returns written files"""
+    import json
+    base = os.path.splitext(output_path)[0]
+    written = []
+    for export_format in formats:
+        data = report.to_dict(lang) if export_format == 'json' else report.to_geojson(lang)
+        export_path = f"{base}.{export_format}"
+        with open(export_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        written.append(export_path)
+    return written
 
 def convert_markdown_to_html(markdown_content: str) -> str:
     """Convert markdown content to HTML (reusable function)"""
@@ -491,23 +1744,26 @@ def convert_markdown_to_html(markdown_content: str) -> str:
             html_content = parts[2].strip()
     
     # Add page breaks before main sections - use more explicit page break method
-    html_content = re.sub(r'^# (Fotodokumentation)', r'<div style="page-break-before: always; height: 0; overflow: hidden;"></div>\n<h1>\1</h1>', html_content, flags=re.MULTILINE)
-    html_content = re.sub(r'^## (Anhänge)', r'<div style="page-break-before: always; height: 0; overflow: hidden;"></div>\n<h2>\1</h2>', html_content, flags=re.MULTILINE)
+    # (headings of every available language, so edited files in any language convert alike)
+    languages = available_languages()
+    photo_headings = '|'.join(re.escape(msg('photo_documentation', lang)) for lang in languages)
+    appendix_headings = '|'.join(re.escape(msg('appendices', lang)) for lang in languages)
+    html_content = re.sub(rf'^# ({photo_headings})$', r'<div style="page-break-before: always; height: 0; overflow: hidden;"></div>\n<h1>\1</h1>', html_content, flags=re.MULTILINE)
+    html_content = re.sub(rf'^## ({appendix_headings})$', r'<div style="page-break-before: always; height: 0; overflow: hidden;"></div>\n<h2>\1</h2>', html_content, flags=re.MULTILINE)
     
     # Convert images FIRST (before other conversions) with centering
     # Add orientation detection for smart scaling and ratio calculation
     def add_orientation_class(match):
         img_path = match.group(2)
         try:
-            from PIL import Image
-            with Image.open(img_path) as img:
-                width, height = img.size
-                ratio = width / height
-                orientation = 'landscape' if width > height else 'portrait'
-                return f'<figure data-ratio="{ratio:.4f}"><img src="{img_path}" alt="{match.group(1)}" class="walk-image {orientation}">'
-        except:
-            # Fallback if image analysis fails
-            return f'<figure><img src="{img_path}" alt="{match.group(1)}" class="walk-image">'
+            width, height = get_image_size(img_path)
+            ratio = width / height
+            orientation = 'landscape' if width > height else 'portrait'
+            return figure_open_tag(img_path, match.group(1), ratio, orientation)
+        except (OSError, ValueError, RuntimeError, ZeroDivisionError) as e:
+            # Fallback if image analysis fails: no ratio/orientation, but say so
+            print(f"WARNING: Could not read image size of {img_path}: {e}")
+            return figure_open_tag(img_path, match.group(1), None, None)
     
     html_content = re.sub(r'!\[([^\]]*)\]\(([^)]+)\)', add_orientation_class, html_content)
     
@@ -517,12 +1773,11 @@ def convert_markdown_to_html(markdown_content: str) -> str:
         print(html_content[:1000])
     
     # Convert image captions to figcaption IMMEDIATELY after image conversion
-    # Look for the pattern: <img ...> followed by *Abb. X: caption* and close the figure tag
-    # Use a more robust pattern that handles the German caption format
-    # First, let's try to match the pattern more precisely
-    caption_pattern = r'(<img[^>]+>)\s*\n\*Abb\.\s*(\d+):\s*(.+?)\*'
+    # Look for the pattern: <img ...> followed by *<label> X: caption* and close the figure tag
+    # The label is taken as written ("Abb.", "Fig.", ...), so captions in any language match
+    caption_pattern = r'(<img[^>]+>)\s*\n\*([^*\n]+?)\s*(\d+):\s*(.+?)\*'
     if re.search(caption_pattern, html_content, flags=re.DOTALL):
-        html_content = re.sub(caption_pattern, r'\1<figcaption><strong>Abb. \2:</strong> \3</figcaption></figure>', html_content, flags=re.DOTALL)
+        html_content = re.sub(caption_pattern, r'\1<figcaption><strong>\2 \3:</strong> \4</figcaption></figure>', html_content, flags=re.DOTALL)
     else:
         # Debug: If no matches found, print what we're looking for
         if 'DEBUG_HTML' in os.environ:
@@ -569,8 +1824,153 @@ def convert_markdown_to_html(markdown_content: str) -> str:
     
     return html_content
 
+class PrintLayout:
+    """Print page geometry in mm, read from the @media print rules of print_styles.css"""
+    
+    def __init__(self, css: str = ""):
+        # Defaults mirror styles/print_styles.css and are used for anything the CSS does not set
+        self.page_width = 210.0
+        self.page_height = 297.0
+        self.page_margin = 20.0
+        self.figure_margin = 15.0
+        self.figure_width = 0.80            # fraction of the content width
+        self.narrow_figure_width = 0.61     # ratio < 0.6
+        self.wide_figure_width = 0.90       # 1.5 <= ratio < 1.8
+        self.max_height = 160.0
+        self.landscape_max_height = 80.0
+        self.portrait_max_height = 180.0
+        self.font_size = 12 * 0.2646        # 12px body text
+        self.line_height = 1.5
+        self.caption_font_size = 10 * 0.3528  # 10pt captions
+        self.caption_line_height = 1.25
+        self.caption_extra = 3.0 + 2 * 8 * 0.2646  # margin-top 3mm + 8px padding
+        if css:
+            self._read_css(css)
+    
+    @property
+    def content_width(self) -> float:
+        return self.page_width - 2 * self.page_margin
+    
+    @property
+    def content_height(self) -> float:
+        return self.page_height - 2 * self.page_margin
+    
+    def _read_css(self, css: str):
+        """Pick the relevant lengths out of the stylesheet (print rules override screen rules)"""
+        def rule_value(block: str, selector: str, prop: str) -> Optional[float]:
+            value = None
+            for match in re.finditer(re.escape(selector) + r'\s*\{([^{}]*)\}', block):
+                prop_match = re.search(r'(?:^|[;\s])' + prop + r'\s*:\s*([\d.]+)(mm|%)', match.group(1))
+                if prop_match:
+                    value = float(prop_match.group(1))
+            return value
+        
+        print_start = css.find('@media print')
+        print_css = css[print_start:] if print_start >= 0 else ""
+        
+        page_margin = re.search(r'@page\s*\{[^{}]*?margin\s*:\s*([\d.]+)mm', print_css)
+        if page_margin:
+            self.page_margin = float(page_margin.group(1))
+        
+        narrow = re.search(r'data-ratio\^="0\.5"\][^{]*\{[^}]*max-width\s*:\s*([\d.]+)%', css)
+        if narrow:
+            self.narrow_figure_width = float(narrow.group(1)) / 100
+        wide = re.search(r'data-ratio\^="1\.6"\][^{]*\{[^}]*max-width\s*:\s*([\d.]+)%', css)
+        if wide:
+            self.wide_figure_width = float(wide.group(1)) / 100
+        
+        for block in (css, print_css):
+            width = rule_value(block, 'figure', 'max-width')
+            if width:
+                self.figure_width = width / 100
+            margin = rule_value(block, 'figure', 'margin')
+            if margin:
+                self.figure_margin = margin
+            for selector, attr in (('.walk-image', 'max_height'),
+                                   ('.walk-image.landscape', 'landscape_max_height'),
+                                   ('.walk-image.portrait', 'portrait_max_height')):
+                height = rule_value(block, selector, 'max-height')
+                if height:
+                    setattr(self, attr, height)
+    
+    def text_height(self, text: str, font_size: float, line_height: float, width: float) -> float:
+        """Estimated height of wrapped text (average glyph width is about half the font size)"""
+        chars_per_line = max(1, int(width / (font_size * 0.5)))
+        lines = max(1, math.ceil(len(text) / chars_per_line))
+        return lines * font_size * line_height
+    
+    def figure_height(self, ratio: Optional[float], orientation: Optional[str], caption: str) -> float:
+        """Estimated height of one figure including its caption and top margin"""
+        if ratio is None:
+            fraction, max_height = self.figure_width, self.max_height
+        elif 0.3 <= ratio < 0.6:
+            fraction, max_height = self.narrow_figure_width, self.portrait_max_height
+        elif 1.5 <= ratio < 1.8:
+            fraction, max_height = self.wide_figure_width, self.landscape_max_height
+        else:
+            fraction = self.figure_width
+            max_height = self.landscape_max_height if orientation == 'landscape' else self.portrait_max_height
+        width = self.content_width * fraction
+        image_height = min(width / ratio, max_height) if ratio else max_height
+        caption_height = self.text_height(caption, self.caption_font_size, self.caption_line_height, width)
+        return self.figure_margin + image_height + caption_height + self.caption_extra
+
+def load_print_layout(css_path: str = None) -> PrintLayout:
+    """Build the print layout from a stylesheet, falling back to the installed print_styles.css"""
+    if css_path is None or not os.path.exists(css_path):
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        css_path = os.path.join(os.path.dirname(script_dir), "styles", "print_styles.css")
+    try:
+        return PrintLayout(read_text_cached(css_path))
+    except OSError:
+        return PrintLayout()
+
+def pack_figure_pages(blocks: List[Tuple[str, bool]], layout: PrintLayout) -> List[str]:
+    """
+    Pack (html, is_figure) blocks into explicit A4 page containers. Figures are placed
+    greedily using their aspect ratios (data-ratio); headings and short text blocks are
+    kept together with the following figure.
+    """
+    available = layout.content_height * 0.95  # safety margin for estimation errors
+    pages: List[List[str]] = []
+    current: List[str] = []
+    pending: List[str] = []  # non-figure blocks waiting for the next figure
+    used = pending_height = 0.0
+    
+    for block, is_figure in blocks:
+        if is_figure:
+            ratio_match = re.search(r'data-ratio="([\d.]+)"', block)
+            orientation_match = re.search(r'class="walk-image (landscape|portrait)"', block)
+            caption = re.sub(r'<[^>]+>', '', block.split('<figcaption>', 1)[-1]) if '<figcaption>' in block else ""
+            height = layout.figure_height(float(ratio_match.group(1)) if ratio_match else None,
+                                          orientation_match.group(1) if orientation_match else None,
+                                          caption)
+            if current and used + pending_height + height > available:
+                pages.append(current)
+                current, used = [], 0.0
+            current.extend(pending)
+            current.append(block)
+            used += pending_height + height
+            pending, pending_height = [], 0.0
+        else:
+            text = re.sub(r'<[^>]+>', '', block).strip()
+            if re.match(r'\s*<h[12]', block):
+                height = 14.0  # heading incl. border and spacing
+            else:
+                height = layout.text_height(text, layout.font_size, layout.line_height, layout.content_width) + 4.0
+            pending.append(block)
+            pending_height += height
+    if pending:
+        current.extend(pending)
+    if current:
+        pages.append(current)
+    
+    return ['<div class="figure-page">\n' + '\n\n'.join(page) + '\n</div>' for page in pages]
+
 def convert_markdown_to_pdf(markdown_file: str, output_pdf: str = None) -> bool:
     """Convert markdown file to PDF using wkhtmltopdf"""
+    import subprocess
+    
     if not os.path.exists(markdown_file):
         print(f"ERROR: Markdown file not found: {markdown_file}")
         return False
@@ -651,24 +2051,309 @@ def convert_markdown_to_pdf(markdown_file: str, output_pdf: str = None) -> bool:
         print(f"ERROR converting to PDF: {e}")
         return False
 
+def get_daemon_socket_path() -> str:
+    """
+    Path of the daemon UNIX socket (override with the WIP_SOCKET environment variable).
+    It lives in $XDG_RUNTIME_DIR or in a per-user 0700 folder in the temp directory, so
+    other local users can neither connect to it nor create it first.
+    """
+    if os.environ.get(DAEMON_SOCKET_ENV):
+        return os.environ[DAEMON_SOCKET_ENV]
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "wip.sock")
+    import tempfile
+    user = os.getuid() if hasattr(os, 'getuid') else os.environ.get('USERNAME', 'user')
+    return os.path.join(tempfile.gettempdir(), f"wip-{user}", "wip.sock")
+
+def owned_by_user(path: str) -> bool:
+    """True if path (not following symlinks) belongs to the current user"""
+    if not hasattr(os, 'getuid'):
+        return True
+    try:
+        return os.lstat(path).st_uid == os.getuid()
+    except OSError:
+        return False
+
+def prepare_daemon_socket_dir(socket_path: str) -> Optional[str]:
+    """Create the socket folder private to the user; returns an error message if it is not safe"""
+    import stat
+    folder = os.path.dirname(os.path.abspath(socket_path))
+    try:
+        os.makedirs(folder, mode=0o700, exist_ok=True)
+        info = os.lstat(folder)
+    except OSError as e:
+        return f"Cannot create socket folder {folder}: {e}"
+    if not stat.S_ISDIR(info.st_mode) or not owned_by_user(folder):
+        return f"Socket folder {folder} is not a folder owned by you"
+    if info.st_mode & 0o077 and os.path.basename(folder).startswith('wip-'):
+        os.chmod(folder, 0o700)  # our own folder, created with a looser umask earlier
+    return None
+
+def daemon_supported() -> bool:
+    """UNIX sockets are required for daemon mode (not available on all Windows builds)"""
+    import socket
+    return hasattr(socket, 'AF_UNIX')
+
+def send_daemon_request(request: dict, timeout: float = None) -> Optional[dict]:
+    """Send one JSON request to a running daemon. Returns the reply or None if no daemon answers"""
+    import json
+    import socket
+    
+    socket_path = get_daemon_socket_path()
+    if not daemon_supported() or not os.path.exists(socket_path):
+        return None
+    if not owned_by_user(socket_path):
+        # Someone else's socket: never send our command lines there
+        print(f"WARNING: Ignoring daemon socket {socket_path} (not owned by you)", file=sys.stderr)
+        return None
+    
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            sock.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        return json.loads(b''.join(chunks).decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+
+# Options that start the image processing stage (compression/enhancement)
+IMAGE_STAGE_OPTIONS = ('--compress', '--auto-orient', '--auto-contrast', '--sharpen', '--resize')
+
+def requests_image_stage(argv: List[str]) -> bool:
+    """True if the command line asks for compression or enhancement (long options may be abbreviated)"""
+    for arg in argv:
+        if arg == '--':
+            break
+        if arg.startswith('--'):
+            name = arg.split('=', 1)[0]
+            if len(name) > 3 and any(option.startswith(name) for option in IMAGE_STAGE_OPTIONS):
+                return True
+        elif arg.startswith('-') and len(arg) > 1:
+            # Cluster of short flags such as -yc; -c, -r and -y take no value
+            for letter in arg[1:]:
+                if letter == 'c':
+                    return True
+                if letter not in 'ry':
+                    break
+    return False
+
+def run_via_daemon(argv: List[str]) -> Optional[int]:
+    """Forward a command line to the daemon. Returns its exit code or None to run locally"""
+    if '--no-daemon' in argv or '--daemon' in argv or '--stop-daemon' in argv or '--import-time' in argv:
+        return None
+    # The daemon replies with the buffered console output once the run is over, so an
+    # event stream (separate from the console, live heartbeats) needs a local run
+    if any(arg.startswith('--events') for arg in argv):
+        return None
+    # Same for interactive image processing: the progress bar, per-file lines and ETA need
+    # this terminal, and Ctrl+C has to stop the work
+    if requests_image_stage(argv) and sys.stderr.isatty():
+        return None
+    
+    reply = send_daemon_request({'argv': argv, 'cwd': os.getcwd()})
+    if reply is None:
+        return None
+    
+    sys.stdout.write(reply.get('output', ''))
+    sys.stdout.flush()
+    return reply.get('exit_code', 0)
 
+def serve_daemon() -> int:
+    """Run the resident daemon: keeps the interpreter, template cache and metadata cache warm"""
+    import io
+    import json
+    import socket
+    import socketserver
+    import struct
+    from contextlib import redirect_stdout, redirect_stderr
+    
+    if not daemon_supported():
+        print("ERROR: Daemon mode requires UNIX socket support (not available on this platform)")
+        return 1
+    
+    socket_path = get_daemon_socket_path()
+    error = prepare_daemon_socket_dir(socket_path)
+    if error:
+        print(f"ERROR: {error}")
+        return 1
+    if send_daemon_request({'command': 'ping'}, timeout=2) is not None:
+        print(f"ERROR: Daemon already running on {socket_path}")
+        return 1
+    if os.path.lexists(socket_path):
+        if not owned_by_user(socket_path):
+            print(f"ERROR: {socket_path} exists and is not owned by you")
+            return 1
+        os.remove(socket_path)  # stale socket from a crashed daemon
+    
+    # Pre-load everything a typical run needs so the first request is fast too
+    get_pil_image()
+    load_template()
+    load_top_sheet()
+    
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            # The socket runs any command line as this user: only serve the same user
+            if hasattr(socket, 'SO_PEERCRED'):
+                credentials = self.request.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+                pid, uid, gid = struct.unpack('3i', credentials)
+                if uid != os.getuid():
+                    self.wfile.write(json.dumps({'output': 'ERROR: Permission denied\n', 'exit_code': 1}).encode('utf-8'))
+                    return
+            
+            request = json.loads(self.rfile.readline().decode('utf-8'))
+            
+            if request.get('command') == 'ping':
+                reply = {'output': '', 'exit_code': 0}
+            elif request.get('command') == 'stop':
+                reply = {'output': 'Daemon stopped.\n', 'exit_code': 0}
+                self.server.stop_requested = True
+            else:
+                output = io.StringIO()
+                previous_cwd = os.getcwd()
+                previous_stdin = sys.stdin
+                # No terminal attached: input() raises EOFError instead of blocking
+                sys.stdin = io.StringIO()
+                try:
+                    os.chdir(request['cwd'])
+                    refresh_catalogs()
+                    with redirect_stdout(output), redirect_stderr(output):
+                        try:
+                            exit_code = main(request['argv']) or 0
+                        except SystemExit as e:
+                            exit_code = e.code if isinstance(e.code, int) else 0
+                        except Exception as e:
+                            print(f"ERROR in daemon: {e}")
+                            exit_code = 1
+                finally:
+                    sys.stdin = previous_stdin
+                    os.chdir(previous_cwd)
+                reply = {'output': output.getvalue(), 'exit_code': exit_code}
+            
+            self.wfile.write(json.dumps(reply).encode('utf-8'))
+    
+    # Owner-only permissions from the moment the socket exists (no window before the chmod)
+    previous_umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(socket_path, RequestHandler)
+    finally:
+        os.umask(previous_umask)
+    os.chmod(socket_path, 0o600)
+    server.stop_requested = False
+    print(f"[OK] Daemon listening on {socket_path} (stop with: wip --stop-daemon)")
+    try:
+        while not server.stop_requested:
+            server.handle_request()
+    except KeyboardInterrupt:
+        print("\nDaemon interrupted.")
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+    return 0
+
+def report_import_time(top: int = 15) -> int:
+    """Measure startup cost with `python -X importtime` and print the slowest imports"""
+    import subprocess
+    import time
+    
+    # Run the script itself (argument parsing included) so no loader shows up in the numbers
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--no-daemon', '--help'],
+                            capture_output=True, text=True, timeout=60)
+    wall_ms = (time.perf_counter() - started) * 1000
+    
+    # Lines look like: "import time:       self [us] |  cumulative | imported package"
+    entries = []
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)', line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            if len(indent) == 1:  # top-level imports only, nested ones are in the cumulative
+                entries.append((int(cumulative_us), int(self_us), module))
+    
+    entries.sort(reverse=True)
+    total_ms = sum(entry[0] for entry in entries) / 1000
+    
+    print("Startup import time (python -X importtime)")
+    print("=" * 60)
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for cumulative_us, self_us, module in entries[:top]:
+        print(f"{cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {module}")
+    print("=" * 60)
+    print(f"Top-level imports: {total_ms:.1f}ms, interpreter start to exit: {wall_ms:.1f}ms")
+    return result.returncode
+
+def query_photo_index(bbox: str = None, date_from: str = None, date_to: str = None) -> int:
+    """Print the reports whose photos fall into a bounding box and/or date range"""
+    from datetime import timedelta
+    try:
+        bbox_values = tuple(float(value) for value in bbox.split(',')) if bbox else None
+        if bbox_values is not None and len(bbox_values) != 4:
+            raise ValueError("bbox needs 4 values")
+        start = datetime.strptime(date_from, "%Y-%m-%d") if date_from else None
+        end = datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1) if date_to else None
+    except ValueError as e:
+        print(f"ERROR: Invalid query ({e}). Use --bbox min_lon,min_lat,max_lon,max_lat --from YYYY-MM-DD --to YYYY-MM-DD")
+        return 1
+    
+    index_path = get_photo_index_path()
+    if not os.path.exists(index_path):
+        print(f"No photo index yet ({index_path}). It is filled by normal wip runs.")
+        return 0
+    
+    index = PhotoIndex(index_path)
+    try:
+        rows = index.query_reports(bbox_values, start, end)
+    finally:
+        index.close()
+    
+    if not rows:
+        print("No reports found.")
+        return 0
+    
+    print(f"{len(rows)} report(s) found:")
+    for report, count, first_taken, last_taken in rows:
+        span = f"{first_taken[:16]} – {last_taken[:16]}".replace('T', ' ') if first_taken else msg('no_timestamp', 'en')
+        print(f"  {report}")
+        print(f"      {count} photo(s), {span}")
+    return 0
 
-def main():
+def main(argv: List[str] = None):
     parser = argparse.ArgumentParser(description='Walk Image Processor - Generate Markdown or Convert to PDF')
     parser.add_argument('-o', '--output', default='walk_documentation.md',
                        help='Output markdown file (default: walk_documentation.md)')
-    parser.add_argument('-t', '--title', default='Begehungsbericht',
-                       help='Document title')
+    parser.add_argument('-t', '--title', default=None,
+                       help='Document title (default: "Begehungsbericht" or its translation)')
     parser.add_argument('-d', '--date', default=None,
                        help='Document date (DD-MM-YYYY format, default: current date)')
-    parser.add_argument('-l', '--location', default='Gebiet',
-                       help='Location/area name')
+    parser.add_argument('-l', '--location', default=None,
+                       help='Location/area name (default: "Gebiet" or its translation)')
+    parser.add_argument('--lang', default=DEFAULT_LANG,
+                       help=f'Report language(s), comma separated, e.g. "de,en" renders both in one run (default: {DEFAULT_LANG})')
     parser.add_argument('-c', '--compress', action='store_true',
                        help='Compress images before processing (reduces file size)')
     parser.add_argument('-m', '--max-size', type=float, default=2.0,
                        help='Maximum image size in MB when compressing (default: 2.0)')
     parser.add_argument('-q', '--quality', type=int, default=85,
                        help='JPEG quality when compressing 1-100 (default: auto-optimize, only with -c)')
+    parser.add_argument('--auto-orient', action='store_true',
+                       help='Rotate images according to their EXIF orientation')
+    parser.add_argument('--auto-contrast', action='store_true',
+                       help='Stretch levels of dull images (auto-contrast)')
+    parser.add_argument('--sharpen', action='store_true',
+                       help='Apply a light unsharp mask')
+    parser.add_argument('--resize', type=int, default=None, metavar='PX',
+                       help='Downscale images so the longest edge is at most PX pixels')
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                       help='Parallel worker processes for compression/enhancement (default: number of CPUs)')
     parser.add_argument('--dry-run', action='store_true',
                        help='Show what would be done without creating files')
     parser.add_argument('--help-browser', action='store_true',
@@ -677,11 +2362,72 @@ def main():
                        help='Custom template file path (default: uses built-in template)')
     parser.add_argument('--top-sheet', default=None,
                        help='Custom top sheet HTML file path (default: uses htmlsheets/top_sheet.html)')
-    
-    args = parser.parse_args()
+    parser.add_argument('--gap-minutes', type=float, default=DEFAULT_SECTION_GAP_MINUTES,
+                       help=f'Start a new walk section after a time gap of this many minutes (default: {DEFAULT_SECTION_GAP_MINUTES})')
+    parser.add_argument('--jump-km', type=float, default=DEFAULT_SECTION_JUMP_KM,
+                       help=f'Start a new walk section after a jump of this many km between photos (default: {DEFAULT_SECTION_JUMP_KM})')
+    parser.add_argument('--section', type=int, default=None,
+                       help='Render only this walk section (numbers as listed in the image order)')
+    parser.add_argument('--pagedjs', action='store_true',
+                       help='Paginate in the browser with the Paged.js polyfill instead of pre-paginated pages')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                       help='Also search subfolders (e.g. per-phone sync folders)')
+    parser.add_argument('--include', action='append', default=None, metavar='GLOB',
+                       help='Only use images matching this glob (relative path or file name, repeatable)')
+    parser.add_argument('--exclude', action='append', default=None, metavar='GLOB',
+                       help='Skip images matching this glob (relative path or file name, repeatable)')
+    parser.add_argument('--no-index', action='store_true',
+                       help='Do not use the per-user photo index (content hashes, reused compressions)')
+    parser.add_argument('--query', action='store_true',
+                       help='List reports with photos matching --bbox/--from/--to (from the photo index) and exit')
+    parser.add_argument('--bbox', default=None,
+                       help='Query bounding box: min_lon,min_lat,max_lon,max_lat')
+    parser.add_argument('--from', dest='date_from', default=None,
+                       help='Query start date (YYYY-MM-DD, inclusive)')
+    parser.add_argument('--to', dest='date_to', default=None,
+                       help='Query end date (YYYY-MM-DD, inclusive)')
+    parser.add_argument('--export', action='append', choices=['json', 'geojson'], default=None,
+                       help='Also write the report model as JSON or GeoJSON next to the output (repeatable)')
+    parser.add_argument('--task-timeout', type=float, default=120,
+                       help='Seconds one image may take before its worker is killed (0 = no isolation with -j 1, default: 120)')
+    parser.add_argument('--retries', type=int, default=1,
+                       help='Retries for a failed or timed-out image (default: 1)')
+    parser.add_argument('--events', choices=['jsonl'], default=None,
+                       help='Emit a machine-readable event stream (JSON lines) on stdout; console output moves to stderr')
+    parser.add_argument('--events-file', default=None,
+                       help='Write the --events stream to this file instead of stdout')
+    parser.add_argument('--no-progress', action='store_true',
+                       help='Do not show the terminal progress bar')
+    parser.add_argument('-y', '--yes', action='store_true',
+                       help='Overwrite existing output files without asking')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Run as resident daemon on a UNIX socket; later wip calls are served by it')
+    parser.add_argument('--stop-daemon', action='store_true',
+                       help='Stop a running daemon')
+    parser.add_argument('--no-daemon', action='store_true',
+                       help='Run in this process even if a daemon is running')
+    parser.add_argument('--import-time', action='store_true',
+                       help='Report startup import time (python -X importtime) and exit')
+    
+    args = parser.parse_args(argv)
+    
+    if args.daemon:
+        return serve_daemon()
+    
+    if args.stop_daemon:
+        reply = send_daemon_request({'command': 'stop'}, timeout=5)
+        print(reply['output'].strip() if reply else "No daemon running.")
+        return 0
+    
+    if args.import_time:
+        return report_import_time()
+    
+    if args.query:
+        return query_photo_index(args.bbox, args.date_from, args.date_to)
     
     # Handle help browser request FIRST
     if args.help_browser:
+        import subprocess
         import webbrowser
         script_dir = os.path.dirname(os.path.abspath(__file__))
         system_dir = os.path.dirname(script_dir)
@@ -704,22 +2450,61 @@ def main():
             print("README opened on GitHub.")
         return
     
+    # Progress bar on an interactive stderr; events as JSON lines on stdout or into a file
+    events_stream = None
+    if args.events_file:
+        events_stream = open(args.events_file, 'w', encoding='utf-8')
+    elif args.events:
+        events_stream = sys.stdout
+    reporter = ProgressReporter(events_stream,
+                                show_bar=not args.no_progress and hasattr(sys.stderr, 'isatty') and sys.stderr.isatty())
+    reporter.event('run_start', argv=argv if argv is not None else sys.argv[1:], cwd=os.getcwd())
+    
+    exit_code = 1
+    try:
+        if events_stream is sys.stdout:
+            from contextlib import redirect_stdout
+            with redirect_stdout(sys.stderr):
+                exit_code = generate_report(args, reporter) or 0
+        else:
+            exit_code = generate_report(args, reporter) or 0
+        return exit_code
+    finally:
+        reporter.close(exit_code)
+        if args.events_file:
+            events_stream.close()
+
+def generate_report(args: argparse.Namespace, reporter: ProgressReporter) -> Optional[int]:
+    """Scan, process and render a report for the parsed command line"""
     # Copy CSS files to working directory for later use
     script_dir = os.path.dirname(os.path.abspath(__file__))
     print_css_source = os.path.join(script_dir, "..", "styles", "print_styles.css")
     print_css_dest = "print_styles.css"
     
+    # One output per language; with several languages the language code goes into the file name
+    languages = [lang.strip() for lang in args.lang.split(',') if lang.strip()]
+    unknown = [lang for lang in languages if lang not in available_languages()]
+    if unknown or not languages:
+        print(f"ERROR: Unknown language {', '.join(unknown) or args.lang!r} (available: {', '.join(available_languages())})")
+        return 1
+    if len(languages) == 1:
+        outputs = [(languages[0], args.output)]
+    else:
+        base, ext = os.path.splitext(args.output)
+        outputs = [(lang, f"{base}.{lang}{ext or '.md'}") for lang in languages]
+    
     # Check for existing files and warn user BEFORE copying/processing
     existing_files = []
-    if os.path.exists(args.output):
-        existing_files.append(args.output)
-    html_output = args.output.replace('.md', '.html')
-    if os.path.exists(html_output):
-        existing_files.append(html_output)
+    for lang, output_path in outputs:
+        if os.path.exists(output_path):
+            existing_files.append(output_path)
+        html_output = output_path.replace('.md', '.html')
+        if os.path.exists(html_output):
+            existing_files.append(html_output)
     if os.path.exists(print_css_dest):
         existing_files.append(print_css_dest)
     
-    if existing_files:
+    if existing_files and not args.dry_run and not args.yes:
         print("\n" + "=" * 60)
         print("CAUTION: The following files will be OVERWRITTEN:")
         for file in existing_files:
@@ -730,11 +2515,14 @@ def main():
         except KeyboardInterrupt:
             print("\nOperation cancelled by user.")
             return
+        except EOFError:
+            print("\nNo terminal to confirm overwrite - rerun with --yes.")
+            return 1
         print("Continuing with file generation...")
         print("=" * 60)
     
     # Now copy CSS files after user confirmation
-    if os.path.exists(print_css_source):
+    if os.path.exists(print_css_source) and not args.dry_run:
         import shutil
         shutil.copy2(print_css_source, print_css_dest)
         print(f"[INFO] CSS file copied: {print_css_dest}")
@@ -748,10 +2536,10 @@ def main():
     print("Walk Image Processor for Scientific Reports")
     print("=" * 60)
     print(f"Working directory: {os.getcwd()}")
-    print(f"Output: {args.output}")
-    print(f"Title: {args.title}")
+    print(f"Output: {', '.join(output_path for lang, output_path in outputs)}")
+    print(f"Title: {args.title or msg('default_title', languages[0])}")
     print(f"Date: {args.date}")
-    print(f"Location: {args.location}")
+    print(f"Location: {args.location or msg('default_location', languages[0])}")
     if args.template:
         print(f"Template: {args.template}")
     else:
@@ -760,14 +2548,38 @@ def main():
         print(f"Compression: Enabled (max {args.max_size}MB, quality {args.quality})")
     else:
         print("Compression: Disabled")
+    image_job = ImageJob(compress=args.compress, max_size_mb=args.max_size,
+                         quality=args.quality if args.quality != 85 else None,
+                         auto_orient=args.auto_orient, auto_contrast=args.auto_contrast,
+                         sharpen=args.sharpen, max_pixels=args.resize)
+    if image_job.settings:
+        print(f"Enhancement: {image_job.settings}")
     print("=" * 60)
     
     # Find images in current directory
-    print("\nSearching for images in current directory...")
-    images = find_images_in_directory('.', 
-                                     compress=args.compress, 
-                                     max_size_mb=args.max_size, 
-                                     quality=args.quality)
+    print("\nSearching for images in current directory" + (" and subfolders..." if args.recursive else "..."))
+    reporter.stage_start('images')
+    # Dry run only lists the image order; compression would modify files
+    index = None if args.no_index or args.dry_run else PhotoIndex()
+    if args.dry_run:
+        image_job = ImageJob()
+    failures: List[dict] = []  # tasks that failed for good: images (after retries) and render steps
+    try:
+        images = find_images_in_directory('.', 
+                                         index=index,
+                                         image_job=image_job,
+                                         workers=args.jobs if args.jobs > 0 else (os.cpu_count() or 1),
+                                         recursive=args.recursive,
+                                         include=args.include,
+                                         exclude=args.exclude,
+                                         reporter=reporter,
+                                         task_timeout=args.task_timeout,
+                                         retries=args.retries,
+                                         failures=failures)
+    finally:
+        if index is not None:
+            index.close()
+    reporter.stage_finish('images', images=len(images), saved_mb=round(reporter.saved_mb, 3), failed=len(failures))
     
     if not images:
         print("ERROR: No images found!")
@@ -776,18 +2588,28 @@ def main():
         print("- filename_YYYYMMDDHHMM___longitude_latitude___.jpg (with timestamp + coordinates)")
         print("- filename_YYYY-MM-DD_HH-MM-SS___longitude_latitude___.jpg (with timestamp + coordinates)")
         print("- overview.jpg (any image file - will be processed)")
-        return
+        return 1
     
     print(f"Found {len(images)} images")
     
     # Sort images: those without datetime first, then by chronological order
     print("\nSorting images: those without datetime first, then by chronological order...")
-    sorted_images = sort_images_by_datetime(images)
+    # Build the report model once; markdown, HTML and exports of every language are rendered from it
+    report = build_report(images, args.title, args.date, args.location,
+                          args.gap_minutes, args.jump_km, args.section)
+    if not report.sections:
+        print(f"ERROR: Section {args.section} not found (run --dry-run without --section to list the sections)")
+        return 1
     
     print("Image order:")
-    for i, image in enumerate(sorted_images, 1):
-        print(f"  {i:2d}. {image.filename}")
-        print(f"      Caption: {image.caption}")
+    section_starts = {section.first_figure: section for section in report.sections}
+    for figure in report.figures:
+        image = figure.image
+        if figure.number in section_starts:
+            section = section_starts[figure.number]
+            print(f"  -- {section.heading(languages[0])}: {section.summary(languages[0])}")
+        print(f"  {figure.number:2d}. {image.filename}")
+        print(f"      Caption: {image.get_caption(languages[0])}")
         if image.datetime:
             print(f"      Date/Time: {image.datetime.strftime('%Y-%m-%d %H:%M:%S')}")
         else:
@@ -801,80 +2623,161 @@ def main():
         print("\nDry run - no files created")
         return
     
-    # Generate markdown with template
-    if args.template:
-        print(f"\nGenerating markdown using custom template: {args.template}")
+    # Load top sheet HTML
+    top_sheet_html = load_top_sheet(args.top_sheet)
+    
+    # Extract body content from top sheet if it's a complete HTML document
+    if top_sheet_html.strip().startswith('<!DOCTYPE') or top_sheet_html.strip().startswith('<html'):
+        # Extract content between <body> and </body> tags
+        body_match = re.search(r'<body[^>]*>(.*?)</body>', top_sheet_html, re.DOTALL | re.IGNORECASE)
+        if body_match:
+            top_sheet_content = body_match.group(1).strip()
+        else:
+            top_sheet_content = top_sheet_html
     else:
-        print("\nGenerating markdown using default template")
-    markdown_content = generate_markdown_content(
-        images,  # Pass original images, function will sort them internally
-        title=args.title, 
-        date=args.date, 
-        location=args.location,
-        template_path=args.template
-    )
+        top_sheet_content = top_sheet_html
     
-    # Write markdown file
-    print(f"Writing to: {args.output}")
-    try:
-        with open(args.output, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
-        print(f"[OK] Successfully created {args.output}")
+    reporter.stage_start('render', total=len(outputs))
+    for lang, output_path in outputs:
+        template = load_template(args.template, lang)
+        report.title = args.title or msg('default_title', lang)
+        report.location = args.location or msg('default_location', lang)
         
-        # Generate HTML file for PDF conversion
-        html_output = args.output.replace('.md', '.html')
-        print(f"Generating HTML for PDF conversion: {html_output}")
+        # Each output step is isolated: a failing step is recorded and the remaining ones still run
+        def run_step(step: str, path: str, func):
+            try:
+                func()
+                return True
+            except Exception as e:
+                print(f"ERROR writing {path}: {e}")
+                failures.append({'stage': 'render', 'step': step, 'path': path, 'error': f"{type(e).__name__}: {e}"})
+                reporter.error(f"ERROR writing {path}: {e}", path=path, step=step)
+                return False
         
-        # Convert markdown to HTML
-        html_content = convert_markdown_to_html(markdown_content)
+        # Generate markdown with template
+        if args.template:
+            print(f"\nGenerating markdown ({lang}) using custom template: {args.template}")
+        else:
+            print(f"\nGenerating markdown ({lang}) using default template")
         
-        # Load top sheet HTML
-        top_sheet_html = load_top_sheet(args.top_sheet)
+        def write_markdown():
+            markdown_content = render_markdown(report, template, lang)
+            print(f"Writing to: {output_path}")
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(markdown_content)
+            print(f"[OK] Successfully created {output_path}")
+            reporter.output(output_path, 'markdown')
         
-        # Extract body content from top sheet if it's a complete HTML document
-        if top_sheet_html.strip().startswith('<!DOCTYPE') or top_sheet_html.strip().startswith('<html'):
-            # Extract content between <body> and </body> tags
-            import re
-            body_match = re.search(r'<body[^>]*>(.*?)</body>', top_sheet_html, re.DOTALL | re.IGNORECASE)
-            if body_match:
-                top_sheet_content = body_match.group(1).strip()
-            else:
-                top_sheet_content = top_sheet_html
-        else:
-            top_sheet_content = top_sheet_html
+        if run_step('markdown', output_path, write_markdown) and not args.no_index:
+            # Remember which photos this report uses
+            def record_report():
+                index = PhotoIndex()
+                try:
+                    index.record_report(output_path, [(figure.number, figure.image) for figure in report.figures])
+                finally:
+                    index.close()
+            run_step('index', get_photo_index_path(), record_report)
         
-        # Create full HTML document with CSS link, top sheet, and running header
-        full_html = f"""<!DOCTYPE html>
-<html>
+        # Structured exports (JSON model, GeoJSON for GIS)
+        if args.export:
+            def write_exports():
+                for export_path in write_report_exports(report, output_path, args.export, lang):
+                    print(f"[OK] Successfully created {export_path}")
+                    reporter.output(export_path, os.path.splitext(export_path)[1][1:])
+            run_step('export', output_path, write_exports)
+        
+        # Generate HTML file for PDF conversion
+        html_output = output_path.replace('.md', '.html')
+        
+        def write_html():
+            print(f"Generating HTML for PDF conversion: {html_output}")
+            
+            # Render HTML from the model; figures are pre-paginated so printing needs no JavaScript pass
+            if args.pagedjs:
+                html_content = render_report_html(report, template, lang=lang)
+                pagination_script = '<script src="https://unpkg.com/pagedjs/dist/paged.polyfill.js"></script>'
+                # Only Paged.js moves this into the page margin (position: running); without it the
+                # logo would print once inline and take space the figure pages do not account for
+                running_header = """    <!-- Running header for print -->
+    <div class="running-header">
+        <img class="logo" alt="Logo" src="../images/logo.png">
+    </div>
+"""
+            else:
+                html_content = render_report_html(report, template, load_print_layout(print_css_dest), lang)
+                pagination_script = ''
+                running_header = ''
+            
+            # Create full HTML document with CSS link, top sheet, and running header
+            full_html = f"""<!DOCTYPE html>
+<html lang="{lang}">
 <head>
     <meta charset="utf-8">
     <title>Walk Documentation</title>
     <link rel="stylesheet" href="print_styles.css">
 </head>
 <body>
-    <!-- Running header for print -->
-    <div class="running-header">
-        <img class="logo" alt="Logo" src="../images/logo.png">
-    </div>
-    
+{running_header}    
     <!-- Top Sheet -->
 {top_sheet_content}
     
     <!-- Main Content -->
 {html_content}
 
-<script src="https://unpkg.com/pagedjs/dist/paged.polyfill.js"></script>
+{pagination_script}
 </body>
 </html>"""
-        
-        with open(html_output, 'w', encoding='utf-8') as f:
-            f.write(full_html)
-        
-        print(f"[OK] Successfully created {html_output}")
-        print(f"[INFO] Open {html_output} in browser and use Print (Ctrl+P) → Save as PDF")
             
-    except Exception as e:
-        print(f"ERROR writing file: {e}")
+            with open(html_output, 'w', encoding='utf-8') as f:
+                f.write(full_html)
+            
+            print(f"[OK] Successfully created {html_output}")
+            print(f"[INFO] Open {html_output} in browser and use Print (Ctrl+P) → Save as PDF")
+            reporter.output(html_output, 'html')
+        
+        run_step('html', html_output, write_html)
+    reporter.stage_finish('render')
+    
+    # Figures rendered without ratio/orientation because the image could not be read
+    for figure in report.figures:
+        if figure.size_error:
+            failures.append({'stage': 'render', 'step': 'figure', 'path': figure.image.filename,
+                             'error': figure.size_error})
+            reporter.error(f"Could not read image size of {figure.image.filename}", path=figure.image.filename)
+    
+    return report_failures(failures, failure_report_path(args.output), reporter)
+
+def failure_report_path(output_path: str) -> str:
+    return os.path.splitext(output_path)[0] + '.failures.json'
+
+def report_failures(failures: List[dict], report_path: str, reporter: ProgressReporter = None) -> int:
+    """Print a failure summary and write it as JSON; returns the process exit code"""
+    if not failures:
+        # A previous run's report would be stale now
+        if os.path.exists(report_path):
+            os.remove(report_path)
+        return 0
+    
+    import json
+    print("\n" + "=" * 60)
+    print(f"FAILED: {len(failures)} task(s) did not complete")
+    for failure in failures:
+        step = failure.get('step', failure['stage'])
+        attempts = f" ({failure['attempts']} attempts)" if failure.get('attempts', 1) > 1 else ""
+        print(f"  [{step}] {failure['path']}: {failure['error']}{attempts}")
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({'created': datetime.now().isoformat(timespec='seconds'), 'failures': failures},
+                      f, ensure_ascii=False, indent=2)
+        print(f"Failure report: {report_path}")
+        if reporter is not None:
+            reporter.output(report_path, 'failures')
+    except OSError as e:
+        print(f"ERROR writing failure report {report_path}: {e}")
+    return 1
 
 if __name__ == "__main__":
-    main()
+    exit_code = run_via_daemon(sys.argv[1:])
+    if exit_code is None:
+        exit_code = main()
+    sys.exit(exit_code or 0)